@@ -1 +1,5 @@
-from .main import run
+def run():
+    # Importing main starts the game, so only do it when asked to;
+    # tools like `python -m mufl.symtable` shouldn't open a window.
+    from . import main
+    main.run()
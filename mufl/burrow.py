@@ -3,13 +3,18 @@ from math import tau
 from enum import Enum
 from dataclasses import dataclass
 from itertools import zip_longest, chain
+from functools import partial
+from time import perf_counter
+
+import numpy
 
 from wasabi2d import clock, keys, event
 
-from .common import add_key_icon, change_sprite_image, KEY_NUMBERS, add_space_instruction, CHEAT, THAT_BLUE
-from .fixes import animate
-from .thing import ThingTile, get_thing_mesage, classify_thing, encode_thing
+from .common import add_key_icon, change_sprite_image, KEY_NUMBERS, add_space_instruction, CHEAT, THAT_BLUE, SpritePool
+from .fixes import animate, add_anchored_emitter
+from .thing import ThingGrid, get_thing_mesage, classify_thing, encode_thing
 from .music import play_sound
+from .planner import search_plan, symbol_fills, SearchTooLong
 
 @dataclass
 class Card:
@@ -47,6 +52,96 @@ ROTS = {
 }
 
 
+WORM_STEP = 1/3
+WORM_DELAY = WORM_STEP / 5
+
+
+@dataclass
+class WormTimeline:
+    """Keyframes for the worm's head, with (time, callback) events"""
+    times: numpy.ndarray
+    xy: numpy.ndarray
+    angles: numpy.ndarray
+    events: list
+    end: float
+
+
+class BurrowPath:
+    """Worm position & direction after each selected card
+
+    `states[0]` is the start; `states[i]` is the (pos, d, crashed) state
+    after the i-th card.  Once the worm crashes (leaves the grid), later
+    cards leave it where it is.
+    """
+    def __init__(self):
+        self.states = [((0, -1), (0, 1), False)]
+        self.num_live = 0
+
+    def __len__(self):
+        return len(self.states) - 1
+
+    @property
+    def end(self):
+        return self.states[-1]
+
+    @property
+    def steps(self):
+        """States for the cards the worm follows, up to & including a crash"""
+        return self.states[1:self.num_live+1]
+
+    def push(self, value):
+        """Add the state after a card with the given value; return it"""
+        pos, d, crashed = self.states[-1]
+        if not crashed:
+            x, y = pos
+            dx, dy = d
+            if value == 'card_foot':
+                pos = x + dx, y + dy
+            elif value == 'card_left':
+                d = dy, -dx
+            elif value == 'card_right':
+                d = -dy, dx
+            x, y = pos
+            crashed = not ((0 <= x < 4) and (0 <= y < 5))
+            self.num_live += 1
+        state = pos, d, crashed
+        self.states.append(state)
+        return state
+
+    def pop(self):
+        state = self.states.pop()
+        if len(self.states) <= self.num_live:
+            self.num_live -= 1
+        return state
+
+    def fill(self):
+        """Fill mask of the tiles the worm burrows through"""
+        grid = ThingGrid()
+        for pos, d, crashed in self.steps:
+            if not crashed:
+                grid.set_filled(pos)
+        return grid.fill
+
+
+def deal_values(shuffle=shuffle):
+    """Shuffle card values into four decks, top card last"""
+    cards = ['card_foot'] * 24 + ['card_left'] * 20 + ['card_right'] * 20
+    shuffle(cards)
+    q = len(cards) // 4
+    decks = cards[0:q], cards[q:2*q], cards[2*q:3*q], cards[3*q:4*q]
+    decks[0].append(decks[0][0])
+    decks[0].append('card_foot')
+    decks[1].append('card_left')
+    decks[2].append('card_right')
+    decks[3].append('card_foot')
+    return decks
+
+
+def deal_decks():
+    """Shuffle the cards into four decks of Cards, top card last"""
+    return tuple([Card(value) for value in deck] for deck in deal_values())
+
+
 class Burrowing:
     music_track = 'burrow'
     end_fadeout_scale = 0
@@ -59,21 +154,16 @@ class Burrowing:
         self.deck_layer = self.worm_layer = self.key_layer1 = game.scene.layers[2]
         self.turncard_layer = self.key_layer2 = self.hypno_layer = game.scene.layers[3]
         self.selcard_layer = game.scene.layers[4]
+        self.turncard_pool = SpritePool(self.turncard_layer)
+        self.selcard_pool = SpritePool(self.selcard_layer)
 
         self.bg_layer.add_sprite('burrow', anchor_x=0, anchor_y=0)
 
-        cards = [Card(c) for c in ['card_foot'] * 24 + ['card_left'] * 20 + ['card_right'] * 20]
-        shuffle(cards)
-        q = len(cards) // 4
-        self.decks = cards[0:q], cards[q:2*q], cards[2*q:3*q], cards[3*q:4*q]
-        self.decks[0].append(Card(self.decks[0][0].value))
-        self.decks[0].append(Card('card_foot'))
-        self.decks[1].append(Card('card_left'))
-        self.decks[2].append(Card('card_right'))
-        self.decks[3].append(Card('card_foot'))
+        self.decks = deal_decks()
 
         self.selecting = False
         self.selected = []
+        self.path = BurrowPath()
 
         self.deck_sprites = []
         self.deck_keylabels = []
@@ -86,7 +176,7 @@ class Burrowing:
         self.arrow_sprite = self.hypno_layer.add_sprite('arrow_guide', color=(1, 1, 1, 0), pos=tile_pos(0, -1), angle=tau/4)
 
         self.tile_sprites = {}
-        self.thing = {}
+        self.thing = ThingGrid()
         for x in range(4):
             for y in range(5):
                 s = self.tile_sprites[x, y] = self.tile_layer.add_sprite(
@@ -94,8 +184,7 @@ class Burrowing:
                     pos=tile_pos(x, y),
                     color=(.607, .592, .235),
                 )
-                t = self.thing[x, y] = ThingTile()
-                t.update_sprite(s)
+                self.thing.update_sprite((x, y), s)
 
         x, y = tile_pos(0, -1)
         self.worm_sprites = [
@@ -127,14 +216,11 @@ class Burrowing:
         pg.add_color_stop(.4, (1, 1, 1, 1))
         pg.add_color_stop(.6, (1, 1, 1, .8))
         pg.add_color_stop(1, (.8, .8, 1, 0))
-        self.hypno_emitters = []
-        for x in range(4):
-            for y in range(5):
-                em = pg.add_emitter(
-                    rate=1, pos=tile_pos(x, y), pos_spread=(16, 16),
-                    vel_spread=(8, 8), size=16, spin_spread=tau,
-                )
-                self.hypno_emitters.append(em)
+        self.hypno_emitter = add_anchored_emitter(
+            pg, [tile_pos(x, y) for x in range(4) for y in range(5)],
+            rate=1, pos_spread=(16, 16),
+            vel_spread=(8, 8), size=16, spin_spread=tau,
+        )
 
         for card in (
             #'card_foot','card_left','card_foot','card_right',
@@ -190,7 +276,7 @@ class Burrowing:
         if card.current_animation:
             card.current_animation.cancel()
         if card.anim_sprite:
-            card.anim_sprite.delete()
+            self.turncard_pool.release(card.anim_sprite)
             card.anim_sprite = None
         async def wrapper():
             try:
@@ -198,7 +284,7 @@ class Burrowing:
             finally:
                 card.current_animation = None
                 if card.anim_sprite:
-                    card.anim_sprite.delete()
+                    self.turncard_pool.release(card.anim_sprite)
                     card.anim_sprite = None
                 self.update_deck_sprites()
         card.current_animation = clock.coro.run(wrapper())
@@ -222,10 +308,7 @@ class Burrowing:
             start_face = card.value
             end_face = 'card_back'
         x, y = pos = deck_pos(deck)
-        card.anim_sprite = s = self.turncard_layer.add_sprite(
-            start_face,
-            pos=pos,
-        )
+        card.anim_sprite = s = self.turncard_pool.get(start_face, pos=pos)
         duration = 0.5
         async for t in clock.coro.frames(seconds=duration):
             t /= duration
@@ -245,9 +328,10 @@ class Burrowing:
         card.origin_deck = i
         card.selected_index = len(self.selected)
         self.selected.append(card)
+        self.path.push(card.value)
         card.active = self.update_arrow()
         self.set_animation(card, self.do_put_animation(card))
-        card.sel_sprite = self.selcard_layer.add_sprite(
+        card.sel_sprite = self.selcard_pool.get(
             card.value,
             pos=selected_pos(card.selected_index),
             color=(1, 1, 1, 0),
@@ -256,7 +340,7 @@ class Burrowing:
         self.update_deck_sprites()
 
     async def do_put_animation(self, card):
-        card.anim_sprite = s = self.turncard_layer.add_sprite(
+        card.anim_sprite = s = self.turncard_pool.get(
             card.value,
             pos=deck_pos(card.origin_deck),
         )
@@ -274,7 +358,7 @@ class Burrowing:
                 card.sel_sprite.color = end_color
 
     async def do_undo_animation(self, card):
-        card.anim_sprite = s = self.turncard_layer.add_sprite(
+        card.anim_sprite = s = self.turncard_pool.get(
             card.value,
             pos=selected_pos(card.selected_index),
             scale = 0.3,
@@ -291,9 +375,10 @@ class Burrowing:
             card = self.selected.pop()
         except IndexError:
             return
+        self.path.pop()
         self.decks[card.origin_deck].append(card)
         if card.sel_sprite:
-            card.sel_sprite.delete()
+            self.selcard_pool.release(card.sel_sprite)
             card.sel_sprite = None
         self.set_animation(card, self.do_undo_animation(card))
         self.update_deck_sprites()
@@ -313,6 +398,40 @@ class Burrowing:
             if key == keys.SPACE:
                 self.selecting = False
                 clock.coro.run(self.burrow())
+            if CHEAT and key in HINT_KEYS:
+                clock.coro.run(self.hint(HINT_KEYS[key]))
+
+    async def hint(self, name):
+        """Print the shortest way to burrow the given symbol
+
+        The search is done HINT_SLICE seconds per frame, and given up
+        after HINT_MAX_STATES states.
+        """
+        decks = [[card.value for card in deck] for deck in self.decks]
+        pos, d, crashed = self.path.end
+        if crashed:
+            print(f'Hint: {name} is unreachable')
+            return
+        search = search_plan(
+            decks, symbol_fills(name), pos, d, self.path.fill(),
+            max_states=HINT_MAX_STATES,
+        )
+        while True:
+            frame_end = perf_counter() + HINT_SLICE
+            try:
+                while perf_counter() < frame_end:
+                    next(search)
+            except StopIteration as e:
+                result = e.value
+                break
+            except SearchTooLong:
+                print(f'Hint: no hint for {name}; the search is too long')
+                return
+            await clock.coro.next_frame()
+        if result is None:
+            print(f'Hint: {name} is unreachable')
+        else:
+            print(f'Hint: {name} is', ' '.join(str(i+1) for i in result))
 
     async def anim_arrow(self):
         while self.selecting:
@@ -322,8 +441,8 @@ class Burrowing:
             await clock.coro.sleep(0.2)
 
     def update_arrow(self):
-        x, y, d, crashed = self.get_end_pos()
-        self.arrow_sprite.pos = tile_pos(x, y)
+        pos, d, crashed = self.path.end
+        self.arrow_sprite.pos = tile_pos(*pos)
         if crashed:
             change_sprite_image(self.arrow_sprite, 'nada_guide')
             return False
@@ -332,48 +451,23 @@ class Burrowing:
             change_sprite_image(self.arrow_sprite, 'arrow_guide')
             return True
 
-    def iter_path(self):
-        pos = [0, -1]
-        d = (0, 1)
-        for card in self.selected:
-            if card.value == 'card_foot':
-                pos[0] += d[0]
-                pos[1] += d[1]
-            elif card.value == 'card_left':
-                dx, dy = d
-                d = dy, -dx
-            elif card.value == 'card_right':
-                dx, dy = d
-                d = -dy, dx
-            if not ((0 <= pos[0] < 4) and (0 <= pos[1] < 5)):
-                yield tuple(pos), d, card, True
-                return
-            yield tuple(pos), d, card, False
-
-    def get_end_pos(self):
-        for pos, d, card, crashed in self.iter_path():
-            pass
-        return (*pos, d, crashed)
-
     async def burrow(self):
         play_sound('hypno-start')
+        if CHEAT:
+            print('Card sprites:', self.turncard_pool, self.selcard_pool)
         self.game.info.magic -= 2
 
         for s in (*self.deck_sprites, *chain(*self.deck_keylabels)):
             animate(s, color=(*s.color[:3], 0), y=-100, duration=1, tween='accelerate')
 
-        for i, sprite in enumerate(reversed(self.worm_sprites)):
-            coro = self._burrow_one(sprite, i)
-            if i:
-                clock.coro.run(coro)
-            else:
-                main_coro = coro
-        await main_coro
+        timeline = self._worm_timeline()
+        clock.coro.run(self._animate_worm(timeline))
+        # Wait for the head to finish and shrink away
+        await clock.coro.sleep(timeline.end + 1/2)
         await clock.coro.sleep(1/4)
         play_sound('cast')
 
-        for em in self.hypno_emitters:
-            em.rate = 0
+        self.hypno_emitter.mask[:] = False
 
         message = get_thing_mesage(classify_thing(self.thing))
         message1, sep, message2 = message.partition('\n')
@@ -415,65 +509,109 @@ class Burrowing:
 
         self.game.finish_activity(speedup=3, extra_delay=0.1)
 
-    async def _burrow_one(self, sprite, slp):
-        is_head = not slp
-        D = 1/3
-        prev_pos = (0, -1)
-        prev_d = (0, 1)
-        if slp:
-            await animate(sprite, pos=tile_pos(*prev_pos), duration=slp*D/5)
-        for pos, d, card, crashed in self.iter_path():
-            if is_head and card.sel_sprite:
-                animate(card.sel_sprite, scale=0.5, duration=D/2)
-
-            try:
-                if card.value == 'card_foot':
-                    anim = animate(sprite, pos=tile_pos(*pos), duration=D)
-                    await clock.coro.sleep(D/2)
-                    if is_head:
-                        x, y = pos
-                        if tile := self.thing.get(pos):
-                            tile.set_wormy_corners(d)
-                            tile.update_sprite(self.tile_sprites[pos])
-                        if prev_tile := self.thing.get(prev_pos):
-                            prev_tile.set_wormy_corners(d, 2)
-                            prev_tile.update_sprite(self.tile_sprites[prev_pos])
-                        if prev_d != d:
-                            # Paint a corner
-                            r = ROTS[d]
-                            pr = ROTS[prev_d]
-                            if (r % 2) != (pr % 2):
-                                x, y = pos
-                                pdx, pdy = prev_d
-                                cx = x - pdx
-                                cy = y - pdy
-                                if ctile := self.thing.get((cx, cy)):
-                                    c = r // 2
-                                    corner = [(3, 0), (1, 0), (2, 1), (2, 3)][pr][c]
-                                    ctile.set_corner(corner + 2)
-                                    ctile.update_sprite(self.tile_sprites[cx, cy])
-                    if crashed:
-                        anim.stop()
-                        break
-                    await anim
-                    if is_head:
-                        if tile := self.thing.get((x, y)):
-                            tile.filled = True
-                            tile.update_sprite(self.tile_sprites[pos])
-                    prev_d = d
-                    prev_pos = pos
-                elif card.value == 'card_left':
-                    await animate(sprite, angle=sprite.angle-tau/4, duration=D/2)
-                elif card.value == 'card_right':
-                    await animate(sprite, angle=sprite.angle+tau/4, duration=D/2)
-
-            finally:
-                if is_head:
-                    if card.sel_sprite:
-                        animate(card.sel_sprite, scale=0, color=(1, 1, 1, 0), duration=D)
-
-        clock.coro.run(self._remove_cards())
-        await animate(sprite, scale=0, duration=(10-slp)/20)
+    async def _animate_worm(self, timeline):
+        sprites = list(reversed(self.worm_sprites))
+        n = len(sprites)
+        start = numpy.array([sprite.pos for sprite in sprites], dtype=float)
+        scales = numpy.array([sprite.scale for sprite in sprites])
+        angle = sprites[0].angle
+        # Each segment follows the head, a bit later; until then it
+        # crawls to the start
+        delays = numpy.arange(n) * WORM_DELAY
+        shrink_times = (n - numpy.arange(n)) / 20
+        entry = timeline.xy[0]
+        events = iter(timeline.events)
+        next_event = next(events, None)
+        total = (delays + timeline.end + shrink_times).max()
+        async for t in clock.coro.frames(seconds=total):
+            while next_event and next_event[0] <= t:
+                next_event[1]()
+                next_event = next(events, None)
+            local = t - delays
+            xs = numpy.interp(local, timeline.times, timeline.xy[:, 0])
+            ys = numpy.interp(local, timeline.times, timeline.xy[:, 1])
+            angles = numpy.interp(local, timeline.times, timeline.angles, left=angle)
+            entering = local < 0
+            if entering.any():
+                frac = (t / delays[entering])[:, None]
+                xs[entering], ys[entering] = (start[entering] + (entry - start[entering]) * frac).T
+            shrink = numpy.clip((local - timeline.end) / shrink_times, 0, 1)
+            sizes = scales * (1 - shrink)
+            for sprite, x, y, a, size in zip(sprites, xs, ys, angles, sizes):
+                sprite.pos = x, y
+                sprite.angle = a
+                sprite.scale = size
+
+    def _paint_step(self, pos, d, prev_pos, prev_d):
+        thing = self.thing
+        if pos in thing:
+            thing.set_wormy_corners(pos, d)
+            thing.update_sprite(pos, self.tile_sprites[pos])
+        if prev_pos in thing:
+            thing.set_wormy_corners(prev_pos, d, 2)
+            thing.update_sprite(prev_pos, self.tile_sprites[prev_pos])
+        if prev_d != d:
+            # Paint a corner
+            r = ROTS[d]
+            pr = ROTS[prev_d]
+            if (r % 2) != (pr % 2):
+                x, y = pos
+                pdx, pdy = prev_d
+                cpos = x - pdx, y - pdy
+                if cpos in thing:
+                    c = r // 2
+                    corner = [(3, 0), (1, 0), (2, 1), (2, 3)][pr][c]
+                    thing.set_corner(cpos, corner + 2)
+                    thing.update_sprite(cpos, self.tile_sprites[cpos])
+
+    def _fill_step(self, pos):
+        if pos in self.thing:
+            self.thing.set_filled(pos)
+            self.thing.update_sprite(pos, self.tile_sprites[pos])
+
+    def _worm_timeline(self):
+        """Keyframes of the worm's head, and things to do along the way"""
+        D = WORM_STEP
+        t = 0
+        x, y = tile_pos(*self.path.states[0][0])
+        angle = self.worm_sprites[-1].angle
+        times = [t]
+        xy = [(x, y)]
+        angles = [angle]
+        events = []
+        prev_pos, prev_d, _ = self.path.states[0]
+        for card, (pos, d, crashed) in zip(self.selected, self.path.steps):
+            if s := card.sel_sprite:
+                events.append((t, partial(animate, s, scale=0.5, duration=D/2)))
+            if card.value == 'card_foot':
+                events.append((t + D/2, partial(self._paint_step, pos, d, prev_pos, prev_d)))
+                nx, ny = tile_pos(*pos)
+                if crashed:
+                    # Stop halfway
+                    t += D/2
+                    x, y = (x + nx) / 2, (y + ny) / 2
+                else:
+                    t += D
+                    x, y = nx, ny
+                    events.append((t, partial(self._fill_step, pos)))
+                    prev_pos, prev_d = pos, d
+            elif card.value == 'card_left':
+                t += D/2
+                angle -= tau/4
+            elif card.value == 'card_right':
+                t += D/2
+                angle += tau/4
+            times.append(t)
+            xy.append((x, y))
+            angles.append(angle)
+            if s := card.sel_sprite:
+                events.append((t, partial(animate, s, scale=0, color=(1, 1, 1, 0), duration=D)))
+        events.append((t, lambda: clock.coro.run(self._remove_cards())))
+        events.sort(key=lambda e: e[0])
+        return WormTimeline(
+            numpy.array(times), numpy.array(xy, dtype=float),
+            numpy.array(angles), events, t,
+        )
 
     async def _remove_cards(self):
         for card in self.selected:
@@ -490,9 +628,9 @@ class Burrowing:
                 x //= 62
                 y -= 315 - 32
                 y //= 62
-                if tile := self.thing.get((x, y)):
-                    tile.filled = not tile.filled
-                    tile.update_sprite(self.tile_sprites[x, y])
+                if (x, y) in self.thing:
+                    self.thing.set_filled((x, y), not self.thing.is_filled((x, y)))
+                    self.thing.update_sprite((x, y), self.tile_sprites[x, y])
                 enc = classify_thing(self.thing)
                 try:
                     import pyperclip
@@ -504,6 +642,12 @@ class Burrowing:
 
 
 cheaty_clicks = []
+HINT_KEYS = {keys.H: 'H', keys.E: 'E', keys.L: 'L', keys.P: 'P'}
+# Seconds of hint search per frame, and states to look at in total.
+# (Staying under ~87k states keeps the planner's table from growing
+# past a size whose resizing alone would take most of a frame.)
+HINT_SLICE = 0.003
+HINT_MAX_STATES = 80_000
 if CHEAT:
     def _sort_key(p):
         if len(p) == 1:
@@ -0,0 +1,162 @@
+"""Monte Carlo simulation of burrowing
+
+    python -m mufl.burrowsim [--deals N] [--strategy random|careful]
+                             [--seed S] [--jobs J] [--chunk C]
+                             [--out PATH] [--top K]
+
+deals the burrow decks N times, draws cards using the given strategy,
+and reports how often each shape & symbol comes out.
+
+Deals are simulated in chunks spread over a multiprocessing pool; each
+chunk has its own seed, so results don't depend on the number of jobs.
+Per-chunk shape counts are appended to PATH (JSON lines) as they come in.
+"""
+
+from collections import Counter
+from multiprocessing import Pool
+import json
+import os
+import random
+import sys
+
+from . import symtable
+from .burrow import deal_values
+from .planner import START_POS, START_D, MOVES, WHERE_INDEX, WHERE_FILL
+from .thing import ThingGrid, classify_thing
+
+# Chance of pressing Space after each card
+STOP_CHANCE = 1/16
+
+
+def play_random(decks, rng):
+    """Draw from random decks until crashing or stopping; return the fill"""
+    where = WHERE_INDEX[START_POS, START_D]
+    fill = 0
+    choices = [deck for deck in decks if deck]
+    first = True
+    while choices:
+        deck = decks[0] if first else rng.choice(choices)
+        first = False
+        where = MOVES[deck.pop()][where]
+        if where is None:
+            break
+        fill |= WHERE_FILL[where]
+        if not deck:
+            choices.remove(deck)
+        if rng.random() < STOP_CHANCE:
+            break
+    return fill
+
+
+def play_careful(decks, rng):
+    """Like play_random, but never draw a card that crashes"""
+    where = WHERE_INDEX[START_POS, START_D]
+    fill = 0
+    first = True
+    while True:
+        if first:
+            choices = [decks[0]]
+            first = False
+        else:
+            choices = [
+                deck for deck in decks
+                if deck and MOVES[deck[-1]][where] is not None
+            ]
+        if not choices:
+            break
+        deck = rng.choice(choices)
+        where = MOVES[deck.pop()][where]
+        if where is None:
+            break
+        fill |= WHERE_FILL[where]
+        if rng.random() < STOP_CHANCE:
+            break
+    return fill
+
+
+STRATEGIES = {
+    'random': play_random,
+    'careful': play_careful,
+}
+
+
+def simulate_chunk(args):
+    """Play a chunk of deals; return (chunk number, deals, {code: count})"""
+    seed, chunk, num_deals, strategy = args
+    rng = random.Random(f'{seed}-{chunk}')
+    play = STRATEGIES[strategy]
+    fills = Counter()
+    for i in range(num_deals):
+        fills[play(deal_values(rng.shuffle), rng)] += 1
+    shapes = Counter()
+    for fill, count in fills.items():
+        shapes[classify_thing(ThingGrid(fill))] += count
+    return chunk, num_deals, dict(shapes)
+
+
+def main(argv):
+    num_deals = 100_000
+    strategy = 'random'
+    seed = random.randrange(2**32)
+    jobs = os.cpu_count()
+    chunk_size = 10_000
+    out_path = 'burrowsim.jsonl'
+    top = 30
+    args = iter(argv)
+    for arg in args:
+        if arg == '--deals':
+            num_deals = int(next(args))
+        elif arg == '--strategy':
+            strategy = next(args)
+        elif arg == '--seed':
+            seed = int(next(args))
+        elif arg == '--jobs':
+            jobs = int(next(args))
+        elif arg == '--chunk':
+            chunk_size = int(next(args))
+        elif arg == '--out':
+            out_path = next(args)
+        elif arg == '--top':
+            top = int(next(args))
+        else:
+            print(f'unknown argument: {arg}')
+            return 2
+    if strategy not in STRATEGIES:
+        print(f'unknown strategy: {strategy}; use one of {", ".join(STRATEGIES)}')
+        return 2
+
+    tasks = []
+    for chunk, start in enumerate(range(0, num_deals, chunk_size)):
+        size = min(chunk_size, num_deals - start)
+        tasks.append((seed, chunk, size, strategy))
+
+    print(f'Simulating {num_deals} deals ({strategy}, seed {seed}) in {jobs} jobs')
+    totals = Counter()
+    done = 0
+    with open(out_path, 'w') as out, Pool(jobs) as pool:
+        for chunk, size, shapes in pool.imap_unordered(simulate_chunk, tasks):
+            out.write(json.dumps({
+                'seed': seed, 'strategy': strategy, 'chunk': chunk,
+                'deals': size, 'shapes': shapes,
+            }) + '\n')
+            out.flush()
+            totals.update(shapes)
+            done += size
+            print(f'{done}/{num_deals}', end='\r', flush=True)
+    print(f'Wrote {out_path}')
+
+    symbols = symtable.load()
+    by_symbol = Counter()
+    for code, count in totals.items():
+        by_symbol[symbols.get(code, '')] += count
+    print('Symbols:')
+    for sym, count in by_symbol.most_common(top):
+        print(f'{sym or "(none)":>8} {count:9} {count/num_deals:7.2%}')
+    print('Shapes:')
+    for code, count in totals.most_common(top):
+        print(f'{code:>8} {count:9} {count/num_deals:7.2%}  {symbols.get(code, "")}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,3 +1,5 @@
+from collections import Counter
+
 from wasabi2d import clock, keyboard, animate, keys
 
 CHEAT = False
@@ -23,8 +25,20 @@ KEY_NUMBERS = {
     keys.K_6: 6,
     keys.KP6: 6,
     keys.F6: 6,
+    keys.K_7: 7,
+    keys.KP7: 7,
+    keys.F7: 7,
+    keys.K_8: 8,
+    keys.KP8: 8,
+    keys.F8: 8,
+    keys.K_9: 9,
+    keys.KP9: 9,
+    keys.F9: 9,
 }
 
+# Most dice you can have (and roll at once)
+MAX_DICE = 9
+
 def add_key_icon(layer1, layer2, x, y, label):
     s = layer1.add_sprite('kbd_empty', pos=(x-4, y))
     l = layer2.add_label(label, font='kufam_medium', pos=(x, y+3), color=(0.1, 0.3, 0.8), fontsize=15, align='center')
@@ -39,8 +53,70 @@ def add_space_instruction(layer, text):
     return s, l
 
 
+def tick_census():
+    """Count the live each-tick callbacks, by what they're bound to"""
+    census = Counter()
+    for ref in clock.default_clock._each_tick:
+        callback = ref()
+        if callback is not None:
+            owner = getattr(callback, '__self__', None)
+            if owner is None:
+                census[getattr(callback, '__qualname__', repr(callback))] += 1
+            else:
+                census[type(owner).__name__] += 1
+    return census
+
+
 def change_sprite_image(sprite, image):
     "Workaround for https://github.com/lordmauve/wasabi2d/issues/55 "
     if sprite.image != image:
         sprite.image = image
         sprite._set_dirty()
+
+
+class SpritePool:
+    """Sprites on a layer that are recycled rather than deleted
+
+    `get` hands out a released sprite if there is one, preferring one that
+    already shows the wanted image; `release` hides a sprite for reuse.
+    `hits` and `misses` count reused and newly added sprites.
+    """
+    def __init__(self, layer):
+        self.layer = layer
+        self.free = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image, pos=(0, 0), scale=1, angle=0, color=(1, 1, 1, 1)):
+        sprites = self.free.get(image)
+        if not sprites:
+            sprites = next((s for s in self.free.values() if s), None)
+        if not sprites:
+            self.misses += 1
+            return self.layer.add_sprite(
+                image, pos=pos, scale=scale, angle=angle, color=color,
+            )
+        self.hits += 1
+        sprite = sprites.pop()
+        change_sprite_image(sprite, image)
+        sprite.pos = pos
+        sprite.scale = scale
+        sprite.angle = angle
+        sprite.color = color
+        return sprite
+
+    def release(self, sprite):
+        sprite.color = (*sprite.color[:3], 0)
+        self.free.setdefault(sprite.image, []).append(sprite)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def __repr__(self):
+        return (
+            f'<SpritePool: {self.hits} hits, {self.misses} misses '
+            + f'({self.hit_rate:.0%}), '
+            + f'{sum(len(s) for s in self.free.values())} free>'
+        )
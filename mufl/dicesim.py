@@ -0,0 +1,140 @@
+"""Estimate dice roll outcomes without playing
+
+    python -m mufl.dicesim [--throws N] [--dice 1,2,...] [--seed S]
+                           [--jobs J] [--chunk C]
+
+throws each number of dice N times, the way DiceThrowing does, and
+reports how often each face comes up and the average payout per throw.
+
+Throws are simulated in chunks spread over a multiprocessing pool; each
+chunk has its own seed, so results don't depend on the number of jobs.
+All throws of a chunk share one DiceWorld, each as if on its own table,
+so they are stepped together.  The dice start where they wait to be
+selected, turned as if the player waited a random time before rolling.
+"""
+
+from collections import Counter
+from math import tau, sqrt
+from multiprocessing import Pool
+import os
+import random
+import sys
+
+import numpy as np
+
+from .diceworld import DiceWorld, STEP
+from .dicy import (
+    BONUSES, FACE_NAMES, DIE_SIZE, START_ROTATION, START_ROTATION_SPEED,
+    get_rand_speed, get_rand_rotation_speed, get_selection_positions,
+    get_pair_bonus,
+)
+
+WIDTH = 800
+HEIGHT = 600
+
+# Throws that haven't settled after this long are left out
+MAX_TIME = 60
+
+
+def throw_chunk(args):
+    """Throw a chunk of throws
+
+    Return (number of dice, throws, settled throws, face counts, payout),
+    where the payout is a dict of totals over the settled throws.
+    """
+    seed, chunk, num_dice, num_throws = args
+    rng = random.Random(f'{seed}-{num_dice}-{chunk}')
+    world = DiceWorld(WIDTH, HEIGHT, capacity=num_dice * num_throws)
+    positions = get_selection_positions(num_dice, WIDTH)
+    for throw in range(num_throws):
+        for x, y in positions:
+            i = world.add(
+                (x, y, 50),
+                START_ROTATION * START_ROTATION_SPEED.power(rng.uniform(0, tau)),
+                get_rand_rotation_speed(rng.uniform),
+                r=sqrt(3) * DIE_SIZE,
+                gravity=20,
+            )
+            world.speed[i] = get_rand_speed(rng.uniform)
+
+    n = world.count
+    indices = np.arange(n)
+    groups = indices // num_dice
+    for step in range(int(MAX_TIME / STEP)):
+        if world.all_asleep():
+            break
+        world.step(STEP)
+        world.collide(indices, groups)
+
+    settled = world.locked[:n].reshape(num_throws, num_dice).all(axis=1)
+    faces = world.face[:n].reshape(num_throws, num_dice)[settled]
+    face_counts = np.bincount(faces.ravel(), minlength=len(FACE_NAMES))
+    payout = Counter()
+    for throw_faces in faces:
+        for face in throw_faces:
+            payout.update(BONUSES[face])
+        for face, count in zip(*np.unique(throw_faces, return_counts=True)):
+            for pair in range(count // 2):
+                payout.update(get_pair_bonus(face))
+    payout['magic'] -= num_dice * len(faces)
+    return num_dice, num_throws, len(faces), face_counts.tolist(), dict(payout)
+
+
+def main(argv):
+    num_throws = 10_000
+    dice_counts = range(1, 7)
+    seed = random.randrange(2**32)
+    jobs = os.cpu_count()
+    chunk_size = 500
+    args = iter(argv)
+    for arg in args:
+        if arg == '--throws':
+            num_throws = int(next(args))
+        elif arg == '--dice':
+            dice_counts = [int(n) for n in next(args).split(',')]
+        elif arg == '--seed':
+            seed = int(next(args))
+        elif arg == '--jobs':
+            jobs = int(next(args))
+        elif arg == '--chunk':
+            chunk_size = int(next(args))
+        else:
+            print(f'unknown argument: {arg}')
+            return 2
+
+    tasks = []
+    for num_dice in dice_counts:
+        for chunk, start in enumerate(range(0, num_throws, chunk_size)):
+            size = min(chunk_size, num_throws - start)
+            tasks.append((seed, chunk, num_dice, size))
+
+    print(f'Throwing {", ".join(map(str, dice_counts))} dice {num_throws} times each (seed {seed}) in {jobs} jobs')
+    thrown = Counter()
+    settled = Counter()
+    face_counts = {n: np.zeros(len(FACE_NAMES), dtype=int) for n in dice_counts}
+    payouts = {n: Counter() for n in dice_counts}
+    total_throws = num_throws * len(dice_counts)
+    with Pool(jobs) as pool:
+        for num_dice, size, num_settled, faces, payout in pool.imap_unordered(throw_chunk, tasks):
+            thrown[num_dice] += size
+            settled[num_dice] += num_settled
+            face_counts[num_dice] += faces
+            payouts[num_dice].update(payout)
+            print(f'{sum(thrown.values())}/{total_throws}', end='\r', flush=True)
+    print()
+
+    print('dice  settled ', *(f'{name:>11}' for name in FACE_NAMES), '  food/throw  magic/throw (net)')
+    for num_dice in dice_counts:
+        total = face_counts[num_dice].sum()
+        n = settled[num_dice] or 1
+        print(
+            f'{num_dice:4} {settled[num_dice]/thrown[num_dice]:8.2%} ',
+            *(f'{count/total:11.2%}' for count in face_counts[num_dice]),
+            f'{payouts[num_dice]["food"]/n:11.3f}',
+            f'{payouts[num_dice]["magic"]/n:12.3f}',
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,358 @@
+"""Physics of all the dice, stepped together
+
+DiceWorld keeps the positions, velocities, orientations and angular
+velocities of all dice in NumPy arrays (one row per die), and advances
+them all at once.  Orientations and angular velocities are quaternions
+in pyrr's (x, y, z, w) layout, with the angular velocity being the
+rotation per second.
+
+The world is meant to be stepped by STEP seconds at a time, whatever the
+frame rate; speeds are in pixels per step.  The state before the latest
+step is kept, so drawing can interpolate between the two.
+
+This module doesn't need wasabi2d or an OpenGL context.
+"""
+
+import numpy as np
+
+STEP = 1/60
+
+DAMPING = 0.9
+DAMPING_BOUNCE = 0.7
+
+IDENTITY = np.array([0., 0., 0., 1.])
+X, Y, Z = np.eye(3)
+
+# Face that's up when the die's x, y, z, -x, -y or -z axis points up
+FACE_FOR_AXIS = np.array([1, 3, 2, 1, 4, 0])
+
+
+def quat_mul(q1, q2):
+    """Product of quaternions (as pyrr's Quaternion * Quaternion)"""
+    q1x, q1y, q1z, q1w = q1[..., 0], q1[..., 1], q1[..., 2], q1[..., 3]
+    q2x, q2y, q2z, q2w = q2[..., 0], q2[..., 1], q2[..., 2], q2[..., 3]
+    return np.stack([
+         q1x * q2w + q1y * q2z - q1z * q2y + q1w * q2x,
+        -q1x * q2z + q1y * q2w + q1z * q2x + q1w * q2y,
+         q1x * q2y - q1y * q2x + q1z * q2w + q1w * q2z,
+        -q1x * q2x - q1y * q2y - q1z * q2z + q1w * q2w,
+    ], axis=-1)
+
+
+def cross(a, b):
+    """Cross products of rows of 3-vectors (np.cross is slow for few rows)"""
+    ax, ay, az = a[..., 0], a[..., 1], a[..., 2]
+    bx, by, bz = b[..., 0], b[..., 1], b[..., 2]
+    return np.stack([ay*bz - az*by, az*bx - ax*bz, ax*by - ay*bx], axis=-1)
+
+
+def quat_normalize(q):
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def quat_from_axis(axes):
+    """Rotations about `axes` by their lengths; identity for zero axes"""
+    theta = np.linalg.norm(axes, axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xyz = axes / theta * np.sin(theta / 2)
+    result = np.concatenate([xyz, np.cos(theta / 2)], axis=-1)
+    result[~np.isfinite(result).all(axis=-1)] = IDENTITY
+    return result
+
+
+def quat_matrix(q):
+    """Rotation matrices of quaternions (as pyrr's Quaternion.matrix33)"""
+    q = quat_normalize(q)
+    qx, qy, qz, qw = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack([
+        np.stack([
+            1 - 2 * (qy*qy + qz*qz), 2 * (qx*qy - qz*qw), 2 * (qx*qz + qy*qw),
+        ], axis=-1),
+        np.stack([
+            2 * (qx*qy + qz*qw), 1 - 2 * (qx*qx + qz*qz), 2 * (qy*qz - qx*qw),
+        ], axis=-1),
+        np.stack([
+            2 * (qx*qz - qy*qw), 2 * (qy*qz + qx*qw), 1 - 2 * (qx*qx + qy*qy),
+        ], axis=-1),
+    ], axis=-2)
+
+
+def quat_angle(q):
+    """Rotation angles of quaternions; NaN if they're not normalized"""
+    with np.errstate(invalid='ignore'):
+        return np.arccos(q[..., 3]) * 2
+
+
+def quat_power(q, exponent):
+    """Raise quaternions to a power (as pyrr's Quaternion.power)
+
+    Return the result and a mask of quaternions that could be raised;
+    like pyrr, this refuses (near-)identities.
+    """
+    ok = np.fabs(q[..., 3]) <= 0.9999
+    alpha = np.arccos(np.clip(q[..., 3], -1, 1))
+    new_alpha = alpha * exponent
+    with np.errstate(invalid='ignore', divide='ignore'):
+        multi = np.sin(new_alpha) / np.sin(alpha)
+    result = np.concatenate([
+        q[..., :3] * multi[..., None], np.cos(new_alpha)[..., None],
+    ], axis=-1)
+    return result, ok
+
+
+class DiceWorld:
+    """State of all dice on a table of the given size
+
+    Locked dice are asleep: stepping skips them until a bounce wakes them.
+    `dirty` is set whenever dice change; whatever draws them clears it.
+    """
+    def __init__(self, width, height, capacity=8):
+        self.dirty = True
+        self.width = width
+        self.height = height
+        self.count = 0
+        self.pos = np.zeros((capacity, 3))
+        self.speed = np.zeros((capacity, 3))
+        self.rotation = np.tile(IDENTITY, (capacity, 1))
+        self.rotation_speed = np.tile(IDENTITY, (capacity, 1))
+        self.gravity = np.zeros(capacity)
+        self.r = np.zeros(capacity)
+        self.face = np.full(capacity, -1)
+        self.locked = np.zeros(capacity, dtype=bool)
+        self.low_pt = np.zeros((capacity, 3))
+        self.prev_pos = np.zeros((capacity, 3))
+        self.prev_rotation = np.tile(IDENTITY, (capacity, 1))
+
+    _ARRAYS = (
+        'pos', 'speed', 'rotation', 'rotation_speed',
+        'gravity', 'r', 'face', 'locked', 'low_pt',
+        'prev_pos', 'prev_rotation',
+    )
+
+    def add(self, pos, rotation, rotation_speed, r, gravity):
+        """Add a die; return its index"""
+        if self.count == len(self.pos):
+            for name in self._ARRAYS:
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, array]))
+        i = self.count
+        self.count += 1
+        self.pos[i] = self.prev_pos[i] = pos
+        self.speed[i] = 0
+        self.rotation[i] = self.prev_rotation[i] = rotation
+        self.rotation_speed[i] = rotation_speed
+        self.r[i] = r
+        self.gravity[i] = gravity
+        self.face[i] = -1
+        self.locked[i] = False
+        self.update_low_points([i])
+        self.dirty = True
+        return i
+
+    def set_rotation(self, i, rotation):
+        self.rotation[i] = self.prev_rotation[i] = rotation
+        self.update_low_points([i])
+        self.dirty = True
+
+    def all_asleep(self):
+        return self.locked[:self.count].all()
+
+    def update_low_points(self, idx):
+        """Recompute the lowest corners of the given dice
+
+        Rotation only changes at the start and end of a step, so the
+        walls and collisions in between share these.  A cube's lowest
+        corner has each coordinate at -1 or 1, whichever brings it down;
+        on ties, -1 wins.
+        """
+        rot_mat = quat_matrix(self.rotation[idx])
+        signs = np.where(rot_mat[:, :, 2] >= 0, -1., 1.)
+        self.low_pt[idx] = np.einsum('ki,kij->kj', signs, rot_mat)
+
+    def step(self, dt, spin=None):
+        """Advance all dice by dt seconds
+
+        `spin`, if given, is an extra rotation for all moving dice.
+        """
+        n = self.count
+        self.prev_pos[:n] = self.pos[:n]
+        self.prev_rotation[:n] = self.rotation[:n]
+        moving = ~self.locked[:n]
+        if not moving.any():
+            return
+        self.dirty = True
+
+        # Dice that have nearly stopped get a face, and lock if it's up
+        slow = moving & (
+            (np.abs(self.speed[:n].sum(axis=1)) < 1)
+            & (quat_angle(self.rotation_speed[:n]) < 0.3)
+        )
+        if slow.any():
+            idx = np.flatnonzero(slow)
+            up = quat_matrix(self.rotation[idx])[:, :, 2]
+            aa = np.concatenate([up, -up], axis=1)
+            face_arg = aa.argmax(axis=1)
+            self.face[idx] = FACE_FOR_AXIS[face_arg]
+            lock = idx[aa[np.arange(len(idx)), face_arg] > 0.99]
+            self.locked[lock] = True
+            self.pos[lock, 2] = self.r[lock]
+            moving[lock] = False
+
+        idx = np.flatnonzero(moving)
+        width, height = self.width, self.height
+        if spin is not None:
+            self.rotation[idx] = quat_mul(self.rotation[idx], spin)
+            self.update_low_points(idx)
+        self.pos[idx] += self.speed[idx]
+
+        # Only dice within their bounding radius of a wall can touch it
+        pos = self.pos[idx]
+        r = self.r[idx]
+        near_wall = idx[
+            (pos[:, 0] <= r) | (pos[:, 0] >= width - r)
+            | (pos[:, 1] <= r) | (pos[:, 1] >= height - r)
+            | (pos[:, 2] <= r)
+        ]
+        if len(near_wall):
+            for axis, offset, norm in (
+                (0, 0, X),
+                (0, width, -X),
+                (1, 0, Y),
+                (1, height, -Y),
+                (2, 0, Z),
+            ):
+                dist = (self.pos[near_wall, axis] - offset) * norm[axis]
+                near = dist <= self.r[near_wall]
+                if near.any():
+                    self.bounce(near_wall[near], dist[near], norm)
+
+        power, ok = quat_power(self.rotation_speed[idx], dt)
+        turning = idx[ok]
+        self.rotation[turning] = quat_mul(self.rotation[turning], power[ok])
+        self.update_low_points(turning)
+        self.speed[idx] *= DAMPING ** dt
+        self.speed[idx, 2] -= self.gravity[idx] * dt
+
+    def interpolate(self, alpha):
+        """Positions & rotations of all dice, `alpha` of the way from the
+        state before the latest step to the current one
+        """
+        n = self.count
+        prev_pos = self.prev_pos[:n]
+        pos = prev_pos + (self.pos[:n] - prev_pos) * alpha
+        prev_rotation = self.prev_rotation[:n]
+        rotation = self.rotation[:n].copy()
+        # q and -q are the same rotation; take the nearer one
+        rotation[np.sum(prev_rotation * rotation, axis=1) < 0] *= -1
+        rotation = quat_normalize(prev_rotation + (rotation - prev_rotation) * alpha)
+        return pos, rotation
+
+    def bounce(self, idx, dist, norm):
+        """Bounce the given dice off planes `dist` away in direction `norm`
+
+        `norm` is one direction for all dice, or one per die.
+        Return a mask of the dice that did bounce.
+        """
+        hit = self.low_pt[idx, 2] < dist
+        if not hit.any():
+            return hit
+        idx = idx[hit]
+        dist = dist[hit]
+        norm = np.broadcast_to(norm, (len(hit), 3))[hit]
+        low_pt = self.low_pt[idx]
+        low_pt[:, 2] = 0
+        speed = self.speed[idx]
+
+        self.locked[idx] = False
+        rot_imp = cross(norm, low_pt)
+        rot_imp *= (.5 + np.linalg.norm(speed, axis=1) / 10)[:, None]
+        riq = quat_from_axis(rot_imp)
+        umpq = quat_from_axis(-cross(speed, norm))
+        new_speed = quat_mul(quat_mul(umpq, riq), self.rotation_speed[idx])
+        self.rotation_speed[idx] = quat_normalize(IDENTITY * 0.3 + new_speed * 0.7)
+        speed *= DAMPING_BOUNCE
+
+        # Reflect speed
+        speed -= 2 * np.einsum('ki,ki->k', speed, norm)[:, None] * norm
+        self.speed[idx] = speed
+
+        self.pos[idx] += (self.r[idx] - dist)[:, None] * norm
+        return hit
+
+    def collide(self, indices, groups=None):
+        """Bounce the given dice off each other
+
+        If `groups` is given (a group number for each of the dice), only
+        dice in the same group touch; the groups are as if on different
+        tables.
+
+        Pairs are handled in order, each die against the ones before it.
+        Only pairs that touch at the start are checked; ones that a bounce
+        pushes together are handled on the next step.
+
+        Pairs are bounced in waves: a pair goes in the wave after the last
+        one that moved either of its dice, so pairs in the same wave share
+        no dice and the result is the same as going one by one.
+        """
+        indices = np.asarray(indices)
+        if len(indices) < 2:
+            return
+        j, k = self.touching_pairs(indices, groups)
+        if not len(j):
+            return
+        last_wave = {}
+        waves = []
+        for pair, (a, b) in enumerate(zip(j.tolist(), k.tolist())):
+            wave = max(last_wave.get(a, -1), last_wave.get(b, -1)) + 1
+            last_wave[a] = last_wave[b] = wave
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(pair)
+        for wave in waves:
+            self.collide_pairs(indices[j[wave]], indices[k[wave]])
+
+    def touching_pairs(self, indices, groups=None):
+        """Find which of the given dice touch, by sort-and-sweep along x
+
+        Return arrays j, k of positions in `indices`, with j > k, sorted by
+        j then k.
+        """
+        pos = self.pos[indices]
+        reach = 2 * self.r[indices].max()
+        xs = pos[:, 0]
+        if groups is not None:
+            # Lay the groups' tables side by side, out of each other's reach
+            xs = xs + np.asarray(groups) * (self.width + 2 * reach)
+        order = np.argsort(xs, kind='stable')
+        xs = xs[order]
+        ends = np.searchsorted(xs, xs + reach, side='right')
+        counts = ends - np.arange(len(xs)) - 1
+        first = np.repeat(np.arange(len(xs)), counts)
+        starts = np.cumsum(counts) - counts
+        second = first + 1 + np.arange(counts.sum()) - np.repeat(starts, counts)
+        a = order[first]
+        b = order[second]
+        j = np.maximum(a, b)
+        k = np.minimum(a, b)
+        sq_dist = np.sum((pos[j] - pos[k]) ** 2, axis=-1) / 4
+        touching = sq_dist <= self.r[indices[j]] ** 2
+        j = j[touching]
+        k = k[touching]
+        pair_order = np.lexsort((k, j))
+        return j[pair_order], k[pair_order]
+
+    def collide_pairs(self, i, j):
+        """Bounce dice i off dice j; no die may appear twice"""
+        sep = self.pos[i] - self.pos[j]
+        sq_dist = np.sum(sep ** 2, axis=-1) / 4
+        touching = sq_dist <= self.r[i] ** 2
+        i = i[touching]
+        j = j[touching]
+        sep = sep[touching]
+        dist = np.sqrt(sq_dist[touching])
+        direction = sep / np.linalg.norm(sep, axis=-1, keepdims=True)
+        kick = direction * 20
+        hit = self.bounce(i, dist, direction)
+        self.speed[i[hit]] += kick[hit]
+        hit = self.bounce(j, dist, -direction)
+        self.speed[i[hit]] -= kick[hit]
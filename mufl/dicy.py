@@ -1,31 +1,32 @@
-from math import tau, sqrt, sin, cos, atan2, hypot
+from math import tau, sqrt, sin, cos
 import pkgutil
 from dataclasses import dataclass
-from itertools import chain
 from random import uniform
 from contextlib import contextmanager
 from collections import Counter
 
 import moderngl
-from wasabi2d.allocators.packed import PackedBuffer
+from wasabi2d.allocators.vertlists import dtype_to_moderngl
 from wasabi2d import clock, keyboard, animate, keys
 import numpy
 import numpy as np
-from numpy.linalg import norm as linalg_norm
-from pyrr import Quaternion, Vector3
+from pyrr import Quaternion
 
 from .info import COLORS as BONUS_COLORS
-from .common import add_key_icon, add_space_instruction, KEY_NUMBERS, CHEAT
+from .common import add_key_icon, add_space_instruction, KEY_NUMBERS, CHEAT, MAX_DICE, tick_census
 from .music import play_sound
+from .diceworld import DiceWorld, quat_matrix, STEP
 
 # Parts pilfered from wasabi2d/primitives/sprites.py
 
-DAMPING = 0.9
-DAMPING_BOUNCE = 0.7
-
-UP = Vector3((0, 0, 1))
 DIE_SIZE = 24
 
+# Most physics steps per frame; after a longer hitch the dice slow down
+MAX_STEPS = 8
+
+# Cheat keys that roll this many extra dice, to check the frame rate
+STRESS_KEYS = {keys.T: 50, keys.Y: 100, keys.U: 200}
+
 CUBE_VERTS = np.array([
     [-1, -1,  1],
     [-1,  1,  1],
@@ -118,22 +119,185 @@ BONUSES = (
 class DrawContext:
     tex: moderngl.Texture
     prog: moderngl.Program
-    die: 'Die'
+    ctx: moderngl.Context
 
     def __enter__(self):
         """Bind the given texture to the given program during the context."""
         self.prog['tex'].value = 0
         self.tex.use(0)
-        self.die.layer.ctx.front_face = 'cw'
-        self.die.layer.ctx.cull_face = 'back'
-        self.die.layer.ctx.enable(moderngl.CULL_FACE)
-        self.die.prog['pos'] = tuple(self.die.pos)
-        self.die.prog['rot'] = tuple(chain(*self.die.rotation.matrix44))
-        self.die.prog['size'] = self.die.size * (1+self.die.pos[2]/600)
-        self.die.prog['color'] = self.die.color
+        self.ctx.front_face = 'cw'
+        self.ctx.cull_face = 'back'
+        self.ctx.enable(moderngl.CULL_FACE)
 
     def __exit__(self, *_):
-        self.die.layer.ctx.disable(moderngl.CULL_FACE)
+        self.ctx.disable(moderngl.CULL_FACE)
+
+
+MESH_DTYPE = np.dtype([
+    ('in_vert', '3i1'),
+    ('in_uv', '2u2'),
+])
+INSTANCE_DTYPE = np.dtype([
+    ('in_pos', '3f4'),
+    ('in_rot', '9f4'),
+    ('in_size', 'f4'),
+    ('in_color', '3f4'),
+])
+
+
+# Live GL objects made for drawing dice, by kind
+GL_OBJECTS = Counter()
+
+
+class DiceBuffers:
+    """GL buffers for drawing dice, reused by one dice session after another
+
+    Each session's DiceRenderer takes them over with `acquire()`.  They're
+    released when the layer of the renderer that has them is cleared.
+    """
+    _current = None
+
+    @classmethod
+    def acquire(cls, renderer):
+        buffers = cls._current
+        if buffers is None or buffers.ctx is not renderer.ctx:
+            if buffers is not None:
+                buffers.release()
+            buffers = cls._current = cls(renderer.ctx, renderer.prog)
+        buffers.owner = renderer
+        buffers.set_mesh(renderer.texregion)
+        return buffers
+
+    def __init__(self, ctx, prog):
+        self.ctx = ctx
+        self.prog = prog
+        self.owner = None
+        self.mesh_vbo = self._buffer(reserve=len(CUBE_VERTS) * MESH_DTYPE.itemsize)
+        self.ibo = self._buffer(CUBE_INDEXES)
+        self.instance_vbo = None
+        self.vao = None
+
+    def _buffer(self, *args, **kwargs):
+        GL_OBJECTS['buffer'] += 1
+        return self.ctx.buffer(*args, **kwargs)
+
+    def set_mesh(self, texregion):
+        mesh = np.zeros(len(CUBE_VERTS), dtype=MESH_DTYPE)
+        tc = texregion.texcoords[1::2, :].copy()
+        add = tc[1] + 1
+        mul = (tc[0] - tc[1]) - 2
+        mul[0] //= 5
+        mesh['in_uv'] = CUBE_UV * mul + add
+        mesh['in_vert'] = CUBE_VERTS
+        self.mesh_vbo.write(mesh)
+
+    def reserve(self, num_instances):
+        """Make room for the given number of dice
+
+        Return True if the instance buffer was replaced (and is empty).
+        """
+        nbytes = num_instances * INSTANCE_DTYPE.itemsize
+        if self.vao and self.instance_vbo.size >= nbytes:
+            return False
+        if self.vao:
+            nbytes = max(nbytes, self.instance_vbo.size * 2)
+            self._release_instances()
+        self.instance_vbo = self._buffer(reserve=nbytes, dynamic=True)
+        mesh_format, *mesh_names = dtype_to_moderngl(MESH_DTYPE)
+        inst_format, *inst_names = dtype_to_moderngl(INSTANCE_DTYPE)
+        self.vao = self.ctx.vertex_array(
+            self.prog,
+            [
+                (self.mesh_vbo, mesh_format, *mesh_names),
+                (self.instance_vbo, inst_format + '/i', *inst_names),
+            ],
+            self.ibo,
+        )
+        GL_OBJECTS['vertex array'] += 1
+        return True
+
+    def _release_instances(self):
+        self.vao.release()
+        self.instance_vbo.release()
+        GL_OBJECTS['vertex array'] -= 1
+        GL_OBJECTS['buffer'] -= 1
+        self.vao = None
+        self.instance_vbo = None
+
+    def release(self):
+        if self.vao:
+            self._release_instances()
+        self.mesh_vbo.release()
+        self.ibo.release()
+        GL_OBJECTS['buffer'] -= 2
+        self.owner = None
+        if DiceBuffers._current is self:
+            DiceBuffers._current = None
+
+
+class DiceRenderer:
+    """Draws all dice of a DiceWorld with a single instanced draw call
+
+    The cube mesh is shared; per-die position, rotation matrix, size and
+    color go in an instance buffer that's rewritten once per frame.
+    Dice are drawn in world index order, `alpha` of the way from the
+    previous physics step to the latest one.  The instance buffer is only
+    rewritten when the world or the renderer is dirty, or `alpha` changed.
+    """
+    def __init__(self, world, layer):
+        self.world = world
+        self.alpha = 1
+        self.drawn_alpha = None
+        self.dirty = True
+        self.layer = layer
+        self.ctx = layer.ctx
+        self.prog = load_program(layer.group.shadermgr)
+        self.texregion = layer.group.atlas.get('die')
+        self.size = np.zeros(len(world.pos))
+        self.color = np.ones((len(world.pos), 3))
+        self.instances = np.zeros(len(world.pos), dtype=INSTANCE_DTYPE)
+        self.buffers = DiceBuffers.acquire(self)
+        self.draw_context = DrawContext(self.texregion.tex, self.prog, self.ctx)
+        layer.arrays['mufl', 'dice'] = self
+
+    def add(self, index, size, color):
+        """Set up drawing of the die at the given world index"""
+        if index >= len(self.size):
+            capacity = len(self.world.pos)
+            self.size = np.resize(self.size, capacity)
+            self.color = np.resize(self.color, (capacity, 3))
+            self.instances = np.zeros(capacity, dtype=INSTANCE_DTYPE)
+        self.size[index] = size
+        self.color[index] = color
+        self.dirty = True
+
+    def render(self, camera):
+        n = self.world.count
+        if not n or self.buffers.owner is not self:
+            return
+        if self.buffers.reserve(n):
+            self.dirty = True
+        if self.dirty or self.world.dirty or self.alpha != self.drawn_alpha:
+            self._write_instances(n)
+        with self.draw_context:
+            self.buffers.vao.render(moderngl.TRIANGLES, instances=n)
+
+    def _write_instances(self, n):
+        pos, rotation = self.world.interpolate(self.alpha)
+        instances = self.instances[:n]
+        instances['in_pos'] = pos
+        instances['in_rot'] = quat_matrix(rotation).reshape(n, 9)
+        instances['in_size'] = self.size[:n] * (1 + pos[:, 2] / 600)
+        instances['in_color'] = self.color[:n]
+        self.buffers.instance_vbo.orphan()
+        self.buffers.instance_vbo.write(instances)
+        self.dirty = self.world.dirty = False
+        self.drawn_alpha = self.alpha
+
+    def release(self):
+        if self.buffers.owner is self:
+            self.buffers.release()
+
 
 def load_program(mgr) -> moderngl.Program:
     names = ('die', 'die')
@@ -146,47 +310,89 @@ def load_program(mgr) -> moderngl.Program:
         vertex_shader=vert_shader,
         fragment_shader=frag_shader,
     )
+    GL_OBJECTS['program'] += 1
     return prog
 
-def get_rand_speed():
+START_ROTATION = Quaternion.from_x_rotation(tau/32) * Quaternion.from_y_rotation(tau*0.45)
+START_ROTATION_SPEED = Quaternion.from_y_rotation(1)
+
+
+def get_rand_speed(uniform=uniform):
     angle = uniform(0, tau)
     return np.array([cos(angle) * 2, sin(angle), 1]) * uniform(10, 15)
 
-class Die:
-    def __init__(self, throwing, layer, i, pos=None, gravity=20):
-        self.throwing = throwing
-        self.scene = throwing.game.scene
-        self.rotation = Quaternion.from_x_rotation(tau/32) * Quaternion.from_y_rotation(tau*0.45)
-        self.rotation_speed = Quaternion.from_y_rotation(1)
-        self.pos = numpy.array([250.+150*(i//3), 250.+150*(i%3), 150.])
-        if pos is not None:
-            self.pos[:len(pos)] = pos
-        self.speed = np.zeros(3)
-        self.size = DIE_SIZE
-        self.r = sqrt(3) * self.size
-        self.sq_r = self.r ** 2
-        self.gravity = gravity
-        self.face = None
-        self.locked = False
+def get_rand_rotation_speed(uniform=uniform):
+    return (
+        Quaternion.from_x_rotation(uniform(0, tau*15))
+        * Quaternion.from_y_rotation(uniform(0, tau*15))
+        * Quaternion.from_z_rotation(uniform(0, tau*15))
+    )
 
-        self.layer = layer
-        self._dirty = True
-        layer.objects.add(self)
-        layer._dirty.add(self)
-        self.texregion = layer.group.atlas.get('die')
+def get_selection_positions(num_dice, width):
+    """Where the dice wait to be selected"""
+    xpos = width // 3
+    ysep = 80 + 10 * (6 - num_dice)
+    ypos = 100 + ysep * max(0, 6 - num_dice) // 3
+    return [(xpos, ypos + i * ysep) for i in range(num_dice)]
 
-        self.prog = load_program(self.layer.group.shadermgr)
+def get_pair_bonus(face):
+    """Bonus for a pair of dice showing the given face"""
+    bonuses = Counter(BONUSES[face]) + Counter(BONUSES[face]) + Counter(magic=3)
+    if BONUSES[face] == {'magic': 1}:
+        bonuses['magic'] += 6
+    return bonuses
 
-        self._set_img()
+def _row_attr(owner, name):
+    """Property for the die's row in the given array of its world/renderer"""
+    def getter(self):
+        return getattr(getattr(self, owner), name)[self.index]
 
-        clock.each_tick(self.advance)
+    def setter(self, value):
+        rows = getattr(self, owner)
+        getattr(rows, name)[self.index] = value
+        rows.dirty = True
 
-        #self.speed[:] = 0
-        #self.gravity=0
-        #self.rotation_speed = Quaternion()
-        #self.rotation = Quaternion()
+    return property(getter, setter)
 
-        self.color = [(1,1,1),(0,0,1),(0,1,0),(1,0,0),(1,1,0),(0,1,1),(1,0,1),(0,0,0)][i%8]
+
+class Die:
+    def __init__(self, throwing, i, pos=None, gravity=20, size=DIE_SIZE):
+        self.throwing = throwing
+        self.world = throwing.world
+        self.renderer = throwing.renderer
+        start_pos = numpy.array([250.+150*(i//3), 250.+150*(i%3), 150.])
+        if pos is not None:
+            start_pos[:len(pos)] = pos
+        self.index = self.world.add(
+            start_pos, START_ROTATION, START_ROTATION_SPEED,
+            r=sqrt(3) * size, gravity=gravity,
+        )
+        color = [(1,1,1),(0,0,1),(0,1,0),(1,0,0),(1,1,0),(0,1,1),(1,0,1),(0,0,0)][i%8]
+        self.renderer.add(self.index, size, color)
+
+    pos = _row_attr('world', 'pos')
+    speed = _row_attr('world', 'speed')
+    rotation_speed = _row_attr('world', 'rotation_speed')
+    gravity = _row_attr('world', 'gravity')
+    r = _row_attr('world', 'r')
+    locked = _row_attr('world', 'locked')
+    size = _row_attr('renderer', 'size')
+    color = _row_attr('renderer', 'color')
+
+    @property
+    def rotation(self):
+        return Quaternion(self.world.rotation[self.index])
+
+    @rotation.setter
+    def rotation(self, value):
+        self.world.set_rotation(self.index, value)
+
+    @property
+    def face(self):
+        face = self.world.face[self.index]
+        if face < 0:
+            return None
+        return int(face)
 
     def roll(self):
         self.speed = get_rand_speed()
@@ -194,140 +400,7 @@ class Die:
         self.gravity = 20
 
     def randomize_rotation(self):
-        self.rotation_speed = (
-            Quaternion.from_x_rotation(uniform(0, tau*15))
-            * Quaternion.from_y_rotation(uniform(0, tau*15))
-            * Quaternion.from_z_rotation(uniform(0, tau*15))
-        )
-
-    def _update(self):
-        self._array = self._get_array(self.texregion.tex)
-
-        verts = self._array.get_verts(self._array_id)
-
-        tc = self.texregion.texcoords[1::2, :].copy()
-        add = tc[1] + 1
-        mul = (tc[0] - tc[1]) - 2
-        mul[0] //= 5
-        verts['in_uv'][:] = CUBE_UV * mul + add
-        verts['in_vert'][:] = CUBE_VERTS
-
-    def _get_array(self, tex):
-        k = ('mufl', 'die', id(tex), id(self))
-        array = self.layer.arrays.get(k)
-        if not array:
-            prog = load_program(self.layer.group.shadermgr)
-            array = PackedBuffer(
-                moderngl.TRIANGLES,
-                self.layer.ctx,
-                prog,
-                dtype=np.dtype([
-                    ('in_vert', '3i1'),
-                    ('in_uv', '2u2'),
-                ]),
-                draw_context=DrawContext(tex, prog, self),
-            )
-            self.layer.arrays[k] = array
-        return array
-
-    def _set_img(self):
-        """Set the image."""
-        texregion = self.texregion
-        self.uvs = texregion.texcoords
-        self.orig_verts = CUBE_VERTS
-
-        self._dirty = True
-
-        tex = self.texregion.tex
-
-        # migrate into a new array
-        self._array = self._get_array(tex)
-        self._array_id, _ = self._array.alloc(len(CUBE_VERTS), CUBE_INDEXES)
-
-    def advance(self, dt):
-        if self.locked:
-            return
-        if abs(sum(self.speed)) < 1 and self.rotation_speed.angle < 0.3:
-            a = self.rotation.matrix33.inverse * UP
-            aa = numpy.concatenate((a, -a))
-            face_arg = aa.argmax()
-            self.face = (1, 3, 2, 1, 4, 0)[face_arg]
-            if aa[face_arg] > 0.99:
-                self.locked = True
-                self.pos[2] = self.r
-                return
-        if CHEAT:
-            if keyboard.keyboard.left:
-                self.rotation *= Quaternion.from_y_rotation(-dt)
-            if keyboard.keyboard.right:
-                self.rotation *= Quaternion.from_y_rotation(dt)
-            if keyboard.keyboard.up:
-                self.rotation *= Quaternion.from_x_rotation(dt)
-            if keyboard.keyboard.down:
-                self.rotation *= Quaternion.from_x_rotation(-dt)
-        self.pos += self.speed
-        r = self.r
-        self.bounce(self.pos[0], (1, 0, 0))
-        self.bounce(self.scene.width - self.pos[0], (-1, 0, 0))
-        self.bounce(self.pos[1], (0, 1, 0))
-        self.bounce(self.scene.height - self.pos[1], (0, -1, 0))
-        self.bounce(self.pos[2], (0, 0, 1))
-        #self.bounce(hypot(self.pos[1] - self.pos[0]), (sqrt(1/2), -sqrt(1/2), 0))
-        try:
-            self.rotation *= self.rotation_speed.power(dt)
-        except AssertionError as e:
-            print('AssertionError in pyrr quaternion power:', e)
-            pass
-        self.speed *= DAMPING ** dt
-        self.speed[2] -= self.gravity * dt
-
-    def bounce(self, dist, norm):
-        if dist > self.r:
-            return False
-        norm = numpy.array(norm)
-
-        rot = self.rotation
-        rot_mat = rot.matrix33
-        low_pt = None
-        for xp in -1, 1:
-            for yp in -1, 1:
-                for zp in -1, 1:
-                    point = rot_mat * Vector3([xp, yp, zp])
-                    if low_pt is None or point[2] < low_pt[2]:
-                        low_pt = point
-        if low_pt[2] >= dist:
-            return False
-        #play_sound('die-hit')
-        self.locked = False
-        rot_imp = Vector3(norm).cross(Vector3((*low_pt.xy, 0.0))) * (.5 + hypot(*self.speed) / 10)
-        riq = Quaternion.from_axis(rot_imp)
-        ump = -Vector3(self.speed).cross(norm)
-        umpq = Quaternion.from_axis(ump)
-        if np.isnan(umpq).any():
-            umpq = Quaternion()
-        self.rotation_speed = Quaternion().lerp(umpq * riq * self.rotation_speed, 0.7)
-        self.speed *= DAMPING_BOUNCE
-
-        # Reflect speed
-        if linalg_norm(norm) >= 2:
-            1/0
-        s = self.speed
-        self.speed = s - 2 * s.dot(norm) * norm
-
-        self.pos += (self.r - dist) * norm
-        return True
-
-    def collide(self, other):
-        sep = self.pos - other.pos
-        sq_dist = np.sum(sep ** 2., axis=-1) / 4
-        if sq_dist <= self.sq_r:
-            dist = sqrt(sq_dist)
-
-            direction = sep / linalg_norm(sep)
-            if self.bounce(dist, direction):
-                self.speed += direction * 20
-            if other.bounce(dist, -direction):
-                self.speed -= direction * 20
+        self.rotation_speed = get_rand_rotation_speed()
 
 class DiceThrowing:
     music_track = 'dice'
@@ -344,7 +417,16 @@ class DiceThrowing:
         self.sel_layer = game.scene.layers[3]
         self.sel2_layer = game.scene.layers[4]
 
+        self.world = DiceWorld(game.scene.width, game.scene.height)
+        self.renderer = DiceRenderer(self.world, self.dice_layer)
+        self.time_left = 0
+        self.rolling = False
+        self.ticking = False
+        self.wake()
+
         self.dice = []
+        self.stress_dice = []
+        self.frame_times = []
         self.selection = []
         self.select_dice()
 
@@ -352,14 +434,59 @@ class DiceThrowing:
 
         #self.dice = [Die(self, dice_layer, i) for i in range(4)]
 
-    def collide(self, dt):
-        to_collide = []
-        for die in self.dice:
-            for other in to_collide:
-                die.collide(other)
-            to_collide.append(die)
-
-        if all(d.locked for d in self.dice):
+    def step(self, dt):
+        """Run the physics for the whole steps that fit in the time so far"""
+        self.time_left = min(self.time_left + dt, MAX_STEPS * STEP)
+        while self.time_left >= STEP:
+            self.time_left -= STEP
+            spin = None
+            if CHEAT:
+                spin = Quaternion()
+                if keyboard.keyboard.left:
+                    spin *= Quaternion.from_y_rotation(-STEP)
+                if keyboard.keyboard.right:
+                    spin *= Quaternion.from_y_rotation(STEP)
+                if keyboard.keyboard.up:
+                    spin *= Quaternion.from_x_rotation(STEP)
+                if keyboard.keyboard.down:
+                    spin *= Quaternion.from_x_rotation(-STEP)
+                spin = np.array(spin)
+            self.world.step(STEP, spin)
+            if self.rolling:
+                self.collide()
+        self.renderer.alpha = self.time_left / STEP
+        if self.stress_dice:
+            self.frame_times.append(dt)
+        if self.world.all_asleep():
+            self.sleep()
+
+    def wake(self):
+        if not self.ticking:
+            clock.each_tick(self.step)
+            self.ticking = True
+
+    def sleep(self):
+        """Stop stepping the world until woken"""
+        if self.ticking:
+            clock.unschedule(self.step)
+            self.ticking = False
+            self.renderer.alpha = 1
+        if CHEAT:
+            print('Tick callbacks:', dict(tick_census()))
+            print('Dice GL objects:', dict(GL_OBJECTS))
+
+    def collide(self):
+        rolling = self.dice + self.stress_dice
+        self.world.collide([die.index for die in rolling])
+
+        if all(d.locked for d in rolling):
+            if self.stress_dice:
+                times = np.array(self.frame_times)
+                print(
+                    f'{len(rolling)} dice settled in {len(times)} frames:',
+                    f'{1/times.mean():.1f} fps on average,',
+                    f'{1/times.max():.1f} fps at worst',
+                )
             for die in self.dice:
                 bonuses = BONUSES[die.face]
                 self.game.info.give(**bonuses, pos=die.pos[:2], sleep=0.5 + 0.5 * len(self.dice), outline=True, hoffset=0.5)
@@ -376,9 +503,7 @@ class DiceThrowing:
                             )
                             to_check.discard(other)
                             animate(line, stroke_width=5)
-                            bonuses = Counter(BONUSES[die.face]) + Counter(BONUSES[other.face]) + Counter(magic=3)
-                            if BONUSES[die.face] == {'magic': 1}:
-                                bonuses['magic'] += 6
+                            bonuses = get_pair_bonus(die.face)
                             midpos = (die.pos[:2] + other.pos[:2]) / 2
                             self.game.info.give(**bonuses, pos=midpos, sleep=1.5, outline=True, hoffset=0.5)
                             animate(die, size=die.size*1.1)
@@ -390,36 +515,60 @@ class DiceThrowing:
                     animate(left_die, size=left_die.size*0.99)
                 self.on_finish(speedup=1.1)
 
-            clock.unschedule(self.collide)
+            self.rolling = False
             clock.schedule(give_bonus_pairs, 0.5 * len(self.dice), strong=True)
 
     def on_key_down(self, key):
         if not self.selecting:
             return True
         if key in (keys.ESCAPE, keys.BACKSPACE):
+            self.sleep()
             self.game.abort_activity()
             self.selecting = False
             return True
         elif key in (keys.SPACE, keys.RETURN):
-            play_sound('die-roll')
-            self.selecting = False
-            self.dice = [d for d, v in zip(self.dice, self.selection) if v]
-            for die in self.dice:
-                die.roll()
-            clock.each_tick(self.collide)
-            del self.game.scene.layers[3]
-            del self.game.scene.layers[4]
-            self.game.info.magic -= sum(self.selection)
+            self.roll()
+        elif CHEAT and key in STRESS_KEYS:
+            self.add_stress_dice(STRESS_KEYS[key])
+            self.roll()
         if (num := KEY_NUMBERS.get(key)) is not None:
             play_sound('die-select')
             self.toggle_die(num - 1)
 
+    def roll(self):
+        play_sound('die-roll')
+        self.selecting = False
+        for die, selected in zip(self.dice, self.selection):
+            if not selected:
+                # Shrunk away; no need to keep it spinning
+                die.locked = True
+        self.dice = [d for d, v in zip(self.dice, self.selection) if v]
+        for die in self.dice + self.stress_dice:
+            die.roll()
+        self.rolling = True
+        del self.game.scene.layers[3]
+        del self.game.scene.layers[4]
+        self.game.info.magic -= sum(self.selection)
+
+    def add_stress_dice(self, num):
+        """Add extra dice that roll but don't pay out
+
+        They're scaled down so they cover about a quarter of the table.
+        """
+        w = self.game.scene.width
+        h = self.game.scene.height
+        size = min(DIE_SIZE, sqrt(w * h / 4 / (3 * tau / 2 * num)))
+        for i in range(num):
+            pos = uniform(size * 2, w - size * 2), uniform(size * 2, h - size * 2), 50
+            die = Die(self, i, pos=pos, gravity=0, size=size)
+            self.stress_dice.append(die)
+
     def toggle_die(self, number, time=1, recurse=True):
         try:
             fish_sprite = self.fish_sprites[number]
             die = self.dice[number]
             sel = self.selection[number]
-        except KeyError:
+        except IndexError:
             return
         if sel:
             self.selection[number] = False
@@ -467,13 +616,12 @@ class DiceThrowing:
         if selecting:
             sel_layer.add_label('Select your dice', font='kufam_medium', pos=(xpos, 50), align='center', color=(0.1, 0.3, 0.8), fontsize=30)
 
-        ysep = 80 + 10 * (6 - self.game.info.cube)
-        ypos = 100 + ysep * (6 - self.game.info.cube) // 3
+        num_dice = min(self.game.info.cube, MAX_DICE)
         self.fish_sprites = []
-        for i in range(min(self.game.info.cube, 6)):
+        for i, (xpos, ypos) in enumerate(get_selection_positions(num_dice, w)):
             while i >= len(self.game.info.boxfish):
                 self.game.info.boxfish.append((0.9, 0.9, 0.9))
-            die = Die(self, self.dice_layer, i, pos=(xpos, ypos, 50), gravity=0)
+            die = Die(self, i, pos=(xpos, ypos, 50), gravity=0)
             color = self.game.info.boxfish[i]
             die.color = color
             self.dice.append(die)
@@ -482,7 +630,6 @@ class DiceThrowing:
             self.selection.append(True)
             if selecting:
                 add_key_icon(sel_layer, self.sel2_layer, xpos - 64-4, ypos, str(i+1))
-            ypos += ysep
 
         xpos = w*5//6
         sel_layer.add_label('Rewards', font='kufam_medium', pos=(xpos, 50), align='center', color=(0.1, 0.3, 0.8), fontsize=30)
@@ -1,16 +1,25 @@
 from random import randrange, expovariate, random, lognormvariate, choice
-from math import exp, hypot, tau, copysign, log
+from math import exp, tau, copysign, log
+from collections import defaultdict
 import colorsys
 
+import numpy as np
 from wasabi2d import clock, Group, keyboard, keys
 
-from .fixes import animate, fix_transforms
-from .common import add_key_icon, add_space_instruction
+from .fixes import animate, fix_transforms, Channels, sine
+from .common import add_key_icon, add_space_instruction, MAX_DICE
 from .music import play_sound
 
 MAX_FISH_WIDTH = 16*4*2
 FISH_SIZE = 16*1.5
 
+# Fish this close to the hook open their mouths (and might bite)
+BITE_RADIUS = FISH_SIZE * 4
+
+# Fins swing this far either way, and back and forth in this many seconds
+FIN_ANGLE = 0.4
+FIN_PERIOD = 0.5
+
 class Fishing:
     music_track = 'fish'
 
@@ -21,8 +30,10 @@ class Fishing:
         hook_layer = game.scene.layers[2]
         hud_layer = game.scene.layers[3]
         self.scene = game.scene
+        self.view = game.scroll_node
         self.hook = None
         self.on_finish = on_finish
+        self.swarm = FishSwarm(self)
         self.spawner = FishSpawner(self, fish_layer)
         self.hook = Hook(
             self, hook_layer, self.spawner.group, pos=(game.scene.width//2, 10),
@@ -33,118 +44,253 @@ class Fishing:
         l.scale = 1/2
         add_space_instruction(hud_layer, 'Pull!')
 
+    @property
+    def scroll_y(self):
+        """How far down the sea is scrolled on the screen"""
+        return self.view.offset[1]
+
     def on_key_down(self, key):
         if self.hook.hooked_fish:
             return True
         if key in (keys.ESCAPE, keys.BACKSPACE):
+            self.active = False
             self.game.abort_activity()
             self.selecting = False
             return True
 
 
-class Fish:
-    def __init__(self, fishing, layer, group, pos, speed,
-                 on_finish=lambda f: None):
+class FishSwarm:
+    """Positions and speeds of all fish, updated together
+
+    Each fish has a slot (a row in the arrays).  Swimming fish move by
+    their speed (in pixels per second); caught ones stay where the hook
+    puts them.  Once per frame, fish that swam off the screen are
+    removed, fish that came near the visible part of the sea get a body
+    (and ones that left lose it), and fish with bodies get their group
+    moved.  Fins of fish with bodies are turned by the `fins` channel.
+    """
+    def __init__(self, fishing, capacity=64):
         self.fishing = fishing
-        self.anim = None
-        self.caught = False
-        hue = random()
-        kind = 'fish'
-        fin_pos = (28, -2)
-        anchor_x = 32
-        anchor_y = 32
-        self.bonus = {
-            'food': randrange(2, 5),
-            'magic': randrange(0, int(max(1, log(max(1, -group.y/5))/2))),
-            'cube': 0,
-        }
-        if abs(hue - 1/6) < random() / 16:
-            kind = 'fish_crown'
-            self.bonus['magic'] += randrange(5, 9)
-            hue = 1/6
-        elif random() < 1 / 32 and self.fishing.game.info.cube < 6:
-            kind = 'fish_box'
-            fin_pos = 16, -12
-            anchor_x = 20
-            anchor_y = 48
-            self.bonus['magic'] += 2
-            self.bonus['cube'] += 1
-        elif self.bonus['magic']:
-            kind = 'fish_scaly'
-        color = colorsys.hsv_to_rgb(hue, .7, .9)
-        self.color = color
-        sprite = layer.add_sprite(kind, anchor_x=anchor_x, anchor_y=anchor_y, color=color)
-        self.mouth_sprite = layer.add_sprite('fish_mouth', color=color)
-        self.fin_sprite = layer.add_sprite('fin', color=color, pos=fin_pos)
-        fix_transforms(sprite)
+        self.pos = np.zeros((capacity, 2))
+        self.speed = np.zeros((capacity, 2))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.swimming = np.zeros(capacity, dtype=bool)
+        self.finning = np.zeros(capacity, dtype=bool)
+        self.shown = np.zeros(capacity, dtype=bool)
+        self.fishes = [None] * capacity
+        self.free = list(range(capacity - 1, -1, -1))
+        self.channels = Channels()
+        self.fins = self.channels.add_channel('angle', sine(FIN_ANGLE, FIN_PERIOD))
+        clock.each_tick(self.update)
+
+    _ARRAYS = 'pos', 'speed', 'alive', 'swimming', 'finning', 'shown'
+
+    def add(self, fish, pos, speed):
+        """Add a fish; return its slot"""
+        if not self.free:
+            capacity = len(self.pos)
+            for name in self._ARRAYS:
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+            self.fishes.extend([None] * capacity)
+            self.free = list(range(capacity * 2 - 1, capacity - 1, -1))
+        slot = self.free.pop()
+        self.fishes[slot] = fish
+        self.pos[slot] = pos
+        self.speed[slot] = speed
+        self.alive[slot] = self.swimming[slot] = self.finning[slot] = True
+        return slot
+
+    def remove(self, slot):
+        self.fishes[slot] = None
+        self.alive[slot] = self.swimming[slot] = self.finning[slot] = False
+        self.free.append(slot)
+
+    def update(self, dt):
+        if not self.fishing.active:
+            clock.unschedule(self.update)
+            self.channels.stop()
+            return
+        swimming = self.swimming
+        self.pos[swimming] += self.speed[swimming] * dt
+
+        x = self.pos[:, 0]
+        gone = swimming & (
+            (x < -MAX_FISH_WIDTH)
+            | (x > self.fishing.scene.width + MAX_FISH_WIDTH)
+        )
+        spawner = self.fishing.spawner
+        for slot in np.flatnonzero(gone):
+            if self.shown[slot]:
+                spawner.dematerialize(self.fishes[slot])
+            self.fishes[slot].despawn()
+
+        y = self.pos[:, 1]
+        top = -self.fishing.scroll_y - MAX_FISH_WIDTH
+        bottom = top + self.fishing.scene.height + 2 * MAX_FISH_WIDTH
+        in_view = self.alive & (y > top) & (y < bottom)
+        for slot in np.flatnonzero(in_view & ~self.shown):
+            spawner.materialize(self.fishes[slot])
+        for slot in np.flatnonzero(self.shown & swimming & ~in_view):
+            spawner.dematerialize(self.fishes[slot])
+
+        moving = self.shown & swimming
+        for slot, pos in zip(np.flatnonzero(moving), self.pos[moving]):
+            self.fishes[slot].body.group.pos = pos
+
+
+def roll_fish(game, depth):
+    """Pick a random fish for the given depth; return (kind, hue, bonus)"""
+    hue = random()
+    kind = 'fish'
+    bonus = {
+        'food': randrange(2, 5),
+        'magic': randrange(0, int(max(1, log(max(1, depth/5))/2))),
+        'cube': 0,
+    }
+    if abs(hue - 1/6) < random() / 16:
+        kind = 'fish_crown'
+        bonus['magic'] += randrange(5, 9)
+        hue = 1/6
+    elif random() < 1 / 32 and game.info.cube < MAX_DICE:
+        kind = 'fish_box'
+        bonus['magic'] += 2
+        bonus['cube'] += 1
+    elif bonus['magic']:
+        kind = 'fish_scaly'
+    return kind, hue, bonus
+
+
+# Fin position, anchor_x, anchor_y for each kind of fish
+FISH_KINDS = {
+    'fish': ((28, -2), 32, 32),
+    'fish_scaly': ((28, -2), 32, 32),
+    'fish_crown': ((28, -2), 32, 32),
+    'fish_box': ((16, -12), 20, 48),
+}
+
+# Where fish bodies wait (off the screen) to be used again
+PARKED_POS = (-2 * MAX_FISH_WIDTH, 0)
+
+
+class FishBody:
+    """Sprites of a fish of the given kind, reused for many fish
+
+    The body is parked off the screen until show() puts it on a fish.
+    """
+    def __init__(self, layer, group, kind):
+        self.kind = kind
+        fin_pos, anchor_x, anchor_y = FISH_KINDS[kind]
+        self.sprite = layer.add_sprite(kind, anchor_x=anchor_x, anchor_y=anchor_y)
+        self.mouth_sprite = layer.add_sprite('fish_mouth')
+        self.fin_sprite = layer.add_sprite('fin', pos=fin_pos)
+        fix_transforms(self.sprite)
         self.group = Group([
-            sprite,
+            self.sprite,
             self.mouth_sprite,
             self.fin_sprite,
-        ])
+        ], pos=PARKED_POS)
         group.append(self.group)
-        self.group.pos = pos
-        if speed[0] >= 0:
-            self.group.scale_x = -1
-        self.group.scale_y = 1 - abs(abs(speed[0])) / 2000
-        self.speed = speed
-        self.task = None
-        self.reset_task()
+
+    def show(self, fish):
+        for sprite in self.group:
+            sprite.color = fish.color
+        self.mouth_sprite.angle = 0
+        self.fin_sprite.angle = 0
+        self.group.pos = fish.pos
+        self.group.angle = 0
+        self.group.scale_x, self.group.scale_y = fish.scale
+
+    def park(self):
+        self.group.pos = PARKED_POS
+
+
+class Fish:
+    """A fish in the swarm
+
+    Only fish near the visible part of the sea have a body (sprites);
+    the others are just their slot in the swarm and a few attributes.
+    """
+    def __init__(self, fishing, pos, speed, kind, hue, bonus,
+                 on_finish=lambda f: None):
+        self.fishing = fishing
+        self.swarm = fishing.swarm
+        self.kind = kind
+        self.bonus = bonus
+        self.color = colorsys.hsv_to_rgb(hue, .7, .9)
+        self.scale = (
+            -1 if speed[0] >= 0 else 1,
+            1 - abs(abs(speed[0])) / 2000,
+        )
+        self.body = None
         self.on_finish = on_finish
-        self.fin_task = clock.coro.run(self.move_fin())
         self.cooldown = 0
+        self.anims = []
+        self.slot = self.swarm.add(self, pos, speed)
+        self.fin_start = self.swarm.channels.t
 
-    def reset_task(self):
-        if self.task:
-            self.task.cancel()
-        self.task = clock.coro.run(self.coro())
+    @property
+    def _slot(self):
+        """The fish's row in the swarm arrays
 
-    async def coro(self):
-        try:
-            while self.fishing.active:
-                start_x, start_y = self.group.pos
-                if start_x < -MAX_FISH_WIDTH or start_x > (self.fishing.scene.width + MAX_FISH_WIDTH):
-                    for obj in self.group:
-                        obj.delete()
-                    self.on_finish(self)
-                    self.fin_task.cancel()
-                    return
-                spd_x, spd_y = self.speed
-                dur = 1
-                self.anim = animate(
-                    self.group,
-                    pos=(start_x + spd_x/dur, start_y + spd_y/dur),
-                    tween='linear',
-                    duration=dur,
-                )
-                await self.anim
-                while self.caught:
-                    await clock.coro.sleep(1)
-        finally:
-            self.task = None
+        Despawned fish have no slot; indexing with None would write to
+        every row, so fail instead.
+        """
+        if self.slot is None:
+            raise LookupError('fish has despawned')
+        return self.slot
 
+    @property
+    def pos(self):
+        return self.swarm.pos[self._slot]
 
-    async def move_fin(self):
-        dur = 0.25
-        max_angle = 0.4
-        while self.fishing.active:
-            await animate(
-                self.fin_sprite,
-                angle=max_angle,
-                tween='accel_decel',
-                duration=dur,
-            )
-            await animate(
-                self.fin_sprite,
-                angle=-max_angle,
-                tween='accel_decel',
-                duration=dur,
-            )
+    @pos.setter
+    def pos(self, value):
+        self.swarm.pos[self._slot] = value
+        if self.body:
+            self.body.group.pos = value
+
+    @property
+    def speed(self):
+        return self.swarm.speed[self._slot]
+
+    @speed.setter
+    def speed(self, value):
+        self.swarm.speed[self._slot] = value
+
+    @property
+    def caught(self):
+        return not self.swarm.swimming[self._slot]
+
+    @caught.setter
+    def caught(self, value):
+        self.swarm.swimming[self._slot] = not value
+
+    def stop_fin(self):
+        self.swarm.finning[self._slot] = False
+        if self.body:
+            self.swarm.fins.remove(self.body.fin_sprite)
+
+    def despawn(self):
+        # The fish may swim away before its getaway tweens finish
+        for anim in self.anims:
+            anim.stop()
+        self.on_finish(self)
+        self.swarm.remove(self._slot)
+        self.slot = None
 
 
 class FishSpawner:
+    """Spawns fish, and keeps track of them
+
+    Swimming fish only move sideways, so they're indexed in rows
+    BITE_RADIUS high by their y coordinate.
+    Fish bodies not in use are kept in pools by kind, for reuse.
+    """
     def __init__(self, fishing, layer):
         self.fishes = set()
+        self.rows = defaultdict(set)
+        self.pools = defaultdict(list)
         self.fishing = fishing
         self.scene = fishing.scene
         self.width = self.scene.width
@@ -171,13 +317,8 @@ class FishSpawner:
             y = randrange(self.height * 4)
             if self.fishing.hook.hooked_fish:
                 y -= self.height * 3
-            if y - self.group.y > MAX_FISH_WIDTH:
-                fish = Fish(
-                    self.fishing, self.layer, self.group,
-                    pos=(x, y - self.group.y),
-                    speed=(sx, 0), on_finish=self.fishes.discard,
-                )
-                self.fishes.add(fish)
+            if y - self.fishing.scroll_y > MAX_FISH_WIDTH:
+                self.spawn_fish(pos=(x, y - self.fishing.scroll_y), speed=(sx, 0))
             await clock.coro.sleep(expovariate(self.height/100 + abs(self.fishing.hook.sprite.y/1000)))
         self.task = None
 
@@ -186,6 +327,62 @@ class FishSpawner:
             self.task.cancel()
             self.task = None
 
+    def spawn_fish(self, pos, speed):
+        """Spawn a random fish (without a body until it comes into view)"""
+        kind, hue, bonus = roll_fish(self.fishing.game, -self.fishing.scroll_y)
+        fish = Fish(
+            self.fishing, pos, speed, kind, hue, bonus,
+            on_finish=self.remove_fish,
+        )
+        self.add_fish(fish)
+
+    def materialize(self, fish):
+        """Give a fish a body, reusing a parked one if there is one"""
+        pool = self.pools[fish.kind]
+        if pool:
+            fish.body = pool.pop()
+        else:
+            fish.body = FishBody(self.layer, self.group, fish.kind)
+        fish.body.show(fish)
+        swarm = self.fishing.swarm
+        swarm.shown[fish.slot] = True
+        if swarm.finning[fish.slot]:
+            swarm.fins.add(fish.body.fin_sprite, phase=-fish.fin_start)
+
+    def dematerialize(self, fish):
+        """Park a fish's body, and put it back in the pool"""
+        self.fishing.swarm.fins.remove(fish.body.fin_sprite)
+        fish.body.park()
+        self.pools[fish.kind].append(fish.body)
+        fish.body = None
+        self.fishing.swarm.shown[fish.slot] = False
+
+    def add_fish(self, fish):
+        self.fishes.add(fish)
+        fish.row = int(fish.pos[1] // BITE_RADIUS)
+        self.rows[fish.row].add(fish)
+
+    def remove_fish(self, fish):
+        self.fishes.discard(fish)
+        row = self.rows[fish.row]
+        row.discard(fish)
+        if not row:
+            del self.rows[fish.row]
+
+    def reindex(self, fish):
+        """Update the index after the fish moved up or down"""
+        self.remove_fish(fish)
+        self.add_fish(fish)
+
+    def fishes_near(self, y):
+        """Fish in the rows within BITE_RADIUS of the given y"""
+        row = int(y // BITE_RADIUS)
+        return [
+            fish
+            for r in (row - 1, row, row + 1) if r in self.rows
+            for fish in self.rows[r]
+        ]
+
 
 class Hook:
     def __init__(self, fishing, layer, group, pos):
@@ -202,6 +399,7 @@ class Hook:
         self.cooled_down = True
         self.caught_fish = None
         self.hooked_fish = None
+        self.open_mouths = set()
         self.pullout_speed = 200
         self.want_h = self.scene.height // 5
         self.caught_timer = 0
@@ -220,7 +418,7 @@ class Hook:
 
     async def coro(self):
         space = True
-        while True:
+        while self.fishing.active:
             dt = await clock.coro.next_frame()
             ws = self.sprite.x / self.scene.width
             if self.active:
@@ -266,13 +464,13 @@ class Hook:
                         vel_spread=(100, 50),
                         vel=(0, -200-ys/2),
                         angle_spread=tau,
-                        pos=self.sprite.pos + self.group.pos,
+                        pos=self.sprite.pos,
                     )
                 else:
                     y = 1
             self.sprite.pos = x, y
             self.line.pos = self.sprite.pos
-            gpy = self.group.y
+            gpy = self.fishing.scroll_y
             newy = self.want_h - self.sprite.y
             t = 1 - 2 / (1 + 1.05*exp(dt))
             gpy = gpy * (1-t) + newy * t
@@ -281,11 +479,11 @@ class Hook:
                 if t > 1:
                     t = 1
                 gpy = gpy * (1-t) + newy * t
-            self.group.pos = 0, gpy
+            self.fishing.view.offset = 0, gpy
 
             if fish := self.caught_fish:
                 self.pull_timer += dt
-                fish.group.pos = self.sprite.pos
+                fish.pos = self.sprite.pos
                 if not self.hooked_fish:
                     self.caught_timer -= dt
                     if self.caught_timer < 0:
@@ -298,38 +496,49 @@ class Hook:
                             fish.cooldown = 1
                             xs, ys = fish.speed
                             fish.speed = xs * 4, ys
-                            animate(fish, cooldown=0)
-                            animate(fish, speed=(xs * 2, ys), duration=4)
-                            fish.reset_task()
+                            fish.anims = [
+                                animate(fish, cooldown=0),
+                                animate(fish, speed=(xs * 2, ys), duration=4),
+                            ]
+                            self.fishing.spawner.reindex(fish)
                             self.sprite.image = 'hook'
             else:
-                for fish in self.fishing.spawner.fishes:
-                    dist = hypot(*(self.sprite.pos - fish.group.pos)) / (FISH_SIZE * 4)
-                    if dist < 1:
-                        if dist < 1/4/2 and fish.cooldown <= 0:
-                            play_sound('bite', volume=.4)
-                            fish.mouth_sprite.angle = 0
-                            self.caught_fish = fish
-                            self.sprite.image = 'hook_in'
-                            self.caught_timer = 0.2 + lognormvariate(0, 0.25) / 2
-                            if fish.task:
-                                fish.task.cancel()
-                            if fish.anim:
-                                fish.anim.stop()
-                            break
-                        else:
-                            fish.mouth_sprite.angle = (dist)-1
-                    elif fish.mouth_sprite.angle != 0:
-                        fish.mouth_sprite.angle = 0
+                self.bite()
+
+    def bite(self):
+        """Open the mouths of fish near the hook; maybe catch one"""
+        spawner = self.fishing.spawner
+        near = [fish for fish in spawner.fishes_near(self.sprite.y) if fish.body]
+        open_mouths = set()
+        if near:
+            positions = self.fishing.swarm.pos[[fish.slot for fish in near]]
+            dists = np.hypot(*(self.sprite.pos - positions).T) / BITE_RADIUS
+            for fish, dist in zip(near, dists):
+                if dist < 1:
+                    if dist < 1/4/2 and fish.cooldown <= 0:
+                        play_sound('bite', volume=.4)
+                        fish.body.mouth_sprite.angle = 0
+                        self.caught_fish = fish
+                        self.sprite.image = 'hook_in'
+                        self.caught_timer = 0.2 + lognormvariate(0, 0.25) / 2
+                        fish.caught = True
+                        break
+                    else:
+                        fish.body.mouth_sprite.angle = dist - 1
+                        open_mouths.add(fish)
+        for fish in self.open_mouths - open_mouths:
+            if fish.body:
+                fish.body.mouth_sprite.angle = 0
+        self.open_mouths = open_mouths
 
     def catch_fish(self):
         self.hooked_fish = self.caught_fish
-        self.hooked_fish.fin_task.cancel()
+        self.hooked_fish.stop_fin()
         if self.hooked_fish.speed[0] > 0:
             angle = -tau/4
         else:
             angle = tau/4
-        animate(self.hooked_fish.group, angle=angle)
+        animate(self.hooked_fish.body.group, angle=angle)
         animate(
             self, tween='accelerate', duration=15,
             pullout_speed=1000,
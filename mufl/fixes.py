@@ -1,5 +1,6 @@
 import numpy as np
-from wasabi2d import animate as orig_animate
+from wasabi2d import animate as orig_animate, clock
+from wasabi2d.primitives.particles import Emitter
 
 # Fix for https://github.com/lordmauve/wasabi2d/issues/61
 def animate(*args, **kwargs):
@@ -18,3 +19,132 @@ def fix_transforms(self):
 
     self._Transformable__build_mat = build_mat
     build_mat()
+
+
+class AnchoredEmitter(Emitter):
+    """Emitter that spawns particles around any of several anchor points
+
+    Anchors are given relative to the emitter's position.  `rate` is per
+    anchor; anchors can be switched off by clearing their entries in
+    `mask`.
+    """
+    def __init__(self, group, anchors, *, rate=100.0, pos=(0, 0), **kwargs):
+        # Emitter.__init__ only takes the parameters it finds in
+        # type(self).__dict__, which a subclass doesn't have
+        super().__init__(group, rate=rate, pos=pos)
+        for k, v in kwargs.items():
+            if k not in Emitter.__dict__:
+                raise TypeError(
+                    f"{type(self).__name__}.__init__() does not accept a "
+                    f"keyword argument {k!r}"
+                )
+            setattr(self, k, v)
+        anchors = np.asarray(anchors, dtype=np.float32)
+        self._anchors = np.hstack([anchors, np.ones((len(anchors), 1), dtype=np.float32)])
+        self.mask = np.ones(len(anchors), dtype=bool)
+
+    def _emit(self, dt):
+        num_active = np.count_nonzero(self.mask)
+        num = np.random.poisson(self.rate * dt * num_active)
+
+        if num == 0:
+            return
+
+        xform = self._xform()[:, :2]
+
+        self._vecs[1, :2] = self.vel
+        _, vel, (rotx, roty) = self._vecs @ xform
+        angle = np.arctan2(roty, rotx) + self.emit_angle
+        anchors = self._anchors[self.mask]
+        pos = anchors[np.random.randint(num_active, size=num)] @ xform
+
+        self._group.emit(
+            num,
+            pos=pos,
+            vel=vel,
+            angle=angle,
+            **self._params
+        )
+
+
+def add_anchored_emitter(group, anchors, **kwargs):
+    """Like group.add_emitter(), but emitting around the given anchors"""
+    e = AnchoredEmitter(group, anchors, **kwargs)
+    group.emitters.add(e)
+    return e
+
+
+def sine(amplitude, period):
+    """Time function for channels: a sine wave starting at 0"""
+    def fn(t):
+        return amplitude * np.sin(t * (np.pi * 2 / period))
+    return fn
+
+
+def noise(low, high, period=1, size=64):
+    """Time function for channels: smooth random values between low & high
+
+    The values are random at multiples of `period` and eased in between;
+    the pattern repeats after `size` periods.
+    """
+    values = np.random.uniform(low, high, size)
+    def fn(t):
+        t = np.asarray(t) / period
+        i = np.floor(t).astype(int)
+        f = t - i
+        f = f * f * (3 - 2 * f)
+        a = values[i % size]
+        b = values[(i + 1) % size]
+        return a + (b - a) * f
+    return fn
+
+
+class Channel:
+    """One property of several objects, set from a function of time
+
+    Each object gets `offset + scale * fn(t + phase)`; `fn` is called
+    once for all of them with an array of times.
+    """
+    def __init__(self, attr, fn):
+        self.attr = attr
+        self.fn = fn
+        self.params = {}
+
+    def add(self, obj, phase=0, scale=1, offset=0):
+        self.params[obj] = phase, scale, offset
+
+    def remove(self, obj):
+        self.params.pop(obj, None)
+
+    def evaluate(self, t):
+        if not self.params:
+            return
+        phase, scale, offset = np.array(list(self.params.values())).T
+        values = offset + scale * self.fn(t + phase)
+        for obj, value in zip(self.params, values):
+            setattr(obj, self.attr, value)
+
+
+class Channels:
+    """Procedural animation: channels evaluated together once per frame
+
+    This replaces endless loops of random tweens.  `t` is the time (in
+    seconds) since the channels were created.
+    """
+    def __init__(self):
+        self.t = 0
+        self.channels = []
+        clock.each_tick(self.update)
+
+    def add_channel(self, attr, fn):
+        channel = Channel(attr, fn)
+        self.channels.append(channel)
+        return channel
+
+    def update(self, dt):
+        self.t += dt
+        for channel in self.channels:
+            channel.evaluate(self.t)
+
+    def stop(self):
+        clock.unschedule(self.update)
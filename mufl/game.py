@@ -6,13 +6,14 @@ from wasabi2d.storage import Storage
 
 from .fishy import Fishing
 from .dicy import DiceThrowing
-from .info import Info, InfoNode
+from .info import Info, InfoNode, ScrollNode
 from .island import Island
 from .burrow import Burrowing
 from .shadow import Shadowing, CastAway
 from .missile import AskMissile
 from .intro import Intro
 from .music import set_music, play_sound
+from .thumbnails import ThumbnailCache
 
 
 class Game:
@@ -26,7 +27,12 @@ class Game:
         self.info_layer2 = self.scene.layers[32]
         self.missile_mask = self.scene.layers[40]
 
-        self.action_layers = chain.LayerRange(stop=5)
+        # Layers 0-2 can be scrolled (by the fishing activity); HUD stays put
+        self.scroll_node = ScrollNode(chain.LayerRange(stop=2))
+        self.action_layers = chain.Merge([
+            self.scroll_node,
+            chain.LayerRange(start=3, stop=5),
+        ])
         self.fade_layers = chain.Layers([30])
         self.info_layers = chain.Layers([31, 32])
         self.island_layers = [
@@ -43,6 +49,7 @@ class Game:
         self.input_locked = False
 
         self.island = None
+        self.thumbnails = ThumbnailCache(self.scene.layers.atlas)
         self.info = Info(self, self.info_layer1, self.info_layer2)
         self.island = Island(self)
 
@@ -128,6 +135,7 @@ class Game:
                 self.fade_rect.color = (0, 0, 0, 0)
                 await animate(self.fade_rect, color=(0, 0, 0, 1), duration=0.25, tween='accelerate')
                 black = clock.coro.sleep(0.25)
+                self.scroll_node.offset = 0, 0
                 if idx == None:
                     self.go_intro()
                 elif idx == 0:
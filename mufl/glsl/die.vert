@@ -1,18 +1,19 @@
 #version 330
 
 uniform mat4 proj;
-uniform mat4 rot;
-uniform vec3 pos;
-uniform float size;
 
 in vec3 in_vert;
 in vec3 in_color;
 in ivec2 in_uv;
+in vec3 in_pos;
+in mat3 in_rot;
+in float in_size;
 out vec2 uv;
 out vec3 color;
 uniform sampler2D tex;
 
 void main() {
-    gl_Position = proj * (vec4(pos, 0.0) + rot * vec4(in_vert * size, 1.0));
+    gl_Position = proj * vec4(in_pos + in_rot * (in_vert * in_size), 1.0);
     uv = vec2(in_uv) / textureSize(tex, 0);
+    color = in_color;
 }
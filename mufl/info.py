@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import cached_property
 from traceback import print_exc
 
 from wasabi2d import animate, clock, storage
@@ -7,6 +8,7 @@ from wasabi2d.chain import ChainNode
 from .common import THAT_BLUE, CHEAT
 from .fixes import animate
 from .music import play_sound
+from .thing import Thing
 
 class VisualizedProperty:
     def __set_name__(self, owner, name):
@@ -78,6 +80,7 @@ class Info:
         self.display = [None] * 4
 
         self.known_actions = [False] * 5
+        self._things_changed()
         if self.game.island:
             self.game.island.reset()
 
@@ -117,9 +120,7 @@ class Info:
                 if thing is None:
                     self.things.append(None)
                 else:
-                    thing = str(thing)
-                    assert thing.count('-') == 2
-                    self.things.append(thing)
+                    self.things.append(Thing.parse(str(thing)))
                     self.thing += 1
         if 'display' in storage:
             self.display[:] = [None] * 4
@@ -129,6 +130,7 @@ class Info:
         if 'known_actions' in storage:
             for i, (o, n) in enumerate(zip(self.known_actions, storage['known_actions'])):
                 self.known_actions[i] = bool(n)
+        self._things_changed()
         if self.game.island:
             self.game.island.reset()
 
@@ -137,7 +139,7 @@ class Info:
             'food': self.food,
             'magic': self.magic,
             'boxfish': tuple(self.boxfish),
-            'things': tuple(self.things),
+            'things': tuple(t and str(t) for t in self.things),
             'display': tuple(self.display),
             'known_actions': tuple(self.known_actions),
         })
@@ -200,12 +202,28 @@ class Info:
         else:
             self.things.append(thing)
         self.thing += 1
+        self._things_changed()
 
     def remove_thing(self, i):
         thing = self.things[i]
         print('Casting away', thing)
         self.things[i] = None
         self.thing -= 1
+        for place, d in enumerate(self.display):
+            if d == i:
+                self.display[place] = None
+        if thing not in self.things:
+            self.game.thumbnails.evict(thing)
+        self._things_changed()
+
+    def set_display(self, place, i):
+        self.display[place] = i
+        self._things_changed()
+
+    def _things_changed(self):
+        """Forget cached values derived from `things` and `display`"""
+        self.__dict__.pop('message', None)
+        self.__dict__.pop('message_assembled', None)
 
     def display_message(self, message):
         print(message)
@@ -237,21 +255,21 @@ class Info:
                 pass
         clock.coro.run(animit())
 
-    @property
+    @cached_property
     def message(self):
         msg = ''
         for i in self.display:
-            if i is None:
+            if i is None or self.things[i] is None:
                 label = ''
             else:
-                code1, code2, label = self.things[i].split('-')
+                label = self.things[i].label
             if len(label) == 1:
                 msg += label.upper()
             elif msg and not msg.endswith(' '):
                 msg += ' '
         return msg.strip()
 
-    @property
+    @cached_property
     def message_assembled(self):
         return self.message == 'HELP'
 
@@ -276,3 +294,25 @@ class InfoNode(ChainNode):
         self.inner.draw(scene)
         camera.pos = prev_pos
         scene.layers.shadermgr.set_proj(scene.camera.proj)
+
+
+@dataclass
+class ScrollNode(ChainNode):
+    """Draw layers as if everything in them was moved by 'offset'.
+
+    This moves the camera instead, so the objects' transforms don't change.
+    """
+
+    inner: ChainNode
+    offset: tuple = (0, 0)
+
+    def draw(self, scene):
+        """Draw the effect."""
+        camera = scene.camera
+        prev_pos = camera.pos
+        x, y = self.offset
+        camera.pos = scene.width // 2 - x, scene.height // 2 - y
+        scene.layers.shadermgr.set_proj(scene.camera.proj)
+        self.inner.draw(scene)
+        camera.pos = prev_pos
+        scene.layers.shadermgr.set_proj(scene.camera.proj)
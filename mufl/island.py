@@ -1,4 +1,3 @@
-import pkgutil
 from dataclasses import dataclass
 from itertools import zip_longest
 from math import tau
@@ -9,9 +8,9 @@ import numpy
 
 from .info import COLORS as BONUS_COLORS
 from .common import add_key_icon, add_space_instruction, KEY_NUMBERS, change_sprite_image, THAT_BLUE
-from .fixes import animate
-from .thing import get_thing_sprite_info
+from .fixes import animate, Channels, noise
 from .music import play_sound
+from . import textc
 
 def add_rect_with_topleft_anchor(layer, x, y, w, h, **kwargs):
     return layer.add_rect(w, h, pos=(x+w/2, y+h/2), **kwargs)
@@ -27,20 +26,10 @@ class Action:
 
 
 def load_actions():
-    actions = []
-    PERFORATION = ' 8< '.center(42, '-')
-    text = pkgutil.get_data('mufl', 'text/actions.txt').decode('utf-8')
-    for txt in text.split(PERFORATION):
-        txt = txt.strip()
-        lines = txt.splitlines()
-        cost = lines[1].split()
-        assert not lines[2], lines[2]
-        actions.append(Action(
-            caption=lines[0],
-            cost=tuple(cost),
-            description=lines[3:],
-        ))
-    return actions
+    return [
+        Action(caption=caption, cost=cost, description=list(description))
+        for caption, cost, description in textc.load_actions()
+    ]
 
 
 class Island:
@@ -124,12 +113,23 @@ class Island:
         )
 
         self.flames = []
+        self.flame_channels = channels = Channels()
+        flame_width = noise(.2, .4)
+        flame_height = noise(.2, 1)
+        width = channels.add_channel('scale_x', flame_width)
+        height = channels.add_channel('scale_y', lambda t: flame_width(t) * flame_height(t))
+        angle = channels.add_channel('angle', noise(-tau/8, tau/8))
+        x = channels.add_channel('x', noise(-3, 3))
+        y = channels.add_channel('y', noise(-3, 3))
         for i in range(4):
             s = self.effect_layer.add_sprite('flame', pos=FIRE_POS, scale=1/3, anchor_y=48, color=(1, 0, 0, .4))
-            if i % 2:
-                s.scale_x = -1
             self.flames.append(s)
-            clock.coro.run(self.anim_flame(s, i, *FIRE_POS))
+            phase = uniform(0, 64)
+            width.add(s, phase, scale=-1 if i % 2 else 1)
+            height.add(s, phase)
+            angle.add(s, phase)
+            x.add(s, phase, offset=FIRE_POS[0])
+            y.add(s, phase, offset=FIRE_POS[1])
 
         pg = self.effect_layer.add_particle_group(
             'blur_circle', grow=1.0, max_age=3.2, spin_drag=1.1, gravity=-4,
@@ -161,20 +161,6 @@ class Island:
 
         self.reset()
 
-    async def anim_flame(self, s, i, x, y):
-        while True:
-            d = uniform(0.5, 1.5)
-            sxs = sx = uniform(.2, .4)
-            if i % 2:
-                sxs = -sx
-            await animate(
-                s, duration=d,
-                scale_x=sxs, scale_y=uniform(.2, 1) * sx,
-                angle=uniform(-tau/8, tau/8),
-                pos=(x+uniform(-3, 3), y+uniform(-3, 3)),
-            )
-
-
     def reset(self):
         self.on_wealth_changed()
         self.update_help()
@@ -318,30 +304,21 @@ class Island:
             while self.message_sprites:
                 self.message_sprites.pop().delete()
             self.shadow_sprite.color = 1, 1, 1, 1
+            thumbnails = self.game.thumbnails
             for thing, p in things:
-                sprites_now = []
-                max_x = max_y = 0
-                for x, y, image, angle in get_thing_sprite_info(thing):
-                    s = self.shade_layer.add_sprite(
-                        image, angle=angle,
-                        pos=(390 + (p*5 + x) * 16, 215 + y * 16),
-                        scale=1/4+1/64,
-                        color=(1, 1, 1, 1),
-                    )
-                    sprites_now.append(s)
-                    if x > max_x: max_x = x
-                    if y > max_y: max_y = y
-                    s = self.thing_layer.add_sprite(
-                        image, angle=angle,
-                        pos=(450 + (p*5 + x) * 5, 445 + y * 5),
-                        scale=1/16+2/64,
-                        color=(0, 0, 0, 1),
+                for spacing, x, y, tile_scale, color, layer in (
+                    (16, 390, 215, 1/4+1/64, (1, 1, 1, 1), self.shade_layer),
+                    (5, 450, 445, 1/16+2/64, (0, 0, 0, 1), self.thing_layer),
+                ):
+                    s = thumbnails.add_sprite(
+                        layer, thing, spacing,
+                        pos=(
+                            x + p*5*spacing + (3-thing.max_x)/2 * 64 * tile_scale,
+                            y + (4-thing.max_y) * 64 * tile_scale,
+                        ),
+                        color=color,
                     )
-                    sprites_now.append(s)
-                self.message_sprites.extend(sprites_now)
-                for s in sprites_now:
-                    s.x += (3-max_x)/2 * 64 * s.scale_x
-                    s.y += (4-max_y) * 64 * s.scale_x
+                    self.message_sprites.append(s)
             space_label.color = 1, 1, 1, space_label.color[-1]
         else:
             while self.message_sprites:
@@ -0,0 +1,259 @@
+"""Find the shortest card sequence that burrows a given symbol
+
+The search is A* over (cards taken from each deck, worm position,
+direction, fill mask) states, remembering the cheapest way to each state
+it has seen.  Corners are not part of the state: they don't affect which
+symbol a Thing is (see symtable.py).  States whose fill is not part of
+any target shape are dropped, since tiles can't be un-filled.
+
+    python -m mufl.planner [--deals N] [--seed S]
+
+checks that shuffled deals can still spell H, E, L and P.
+"""
+
+from functools import lru_cache
+from heapq import heappush, heappop
+import random
+import sys
+
+from . import symtable
+from .thing import _fill_bit
+
+START_POS = 0, -1
+START_D = 0, 1
+
+TILES = {_fill_bit(x, y): (x, y) for x in range(4) for y in range(5)}
+BITS = tuple(TILES)
+
+
+def _move(pos, d, value):
+    x, y = pos
+    dx, dy = d
+    if value == 'card_foot':
+        pos = x + dx, y + dy
+    elif value == 'card_left':
+        d = dy, -dx
+    elif value == 'card_right':
+        d = -dy, dx
+    return pos, d
+
+
+# Worm (pos, d) states, and where each card takes them (None on a crash)
+DIRECTIONS = (1, 0), (0, 1), (-1, 0), (0, -1)
+WHERE = [
+    (pos, d)
+    for pos in (START_POS, *(TILES[bit] for bit in BITS))
+    for d in DIRECTIONS
+]
+WHERE_INDEX = {where: i for i, where in enumerate(WHERE)}
+WHERE_FILL = [
+    0 if pos == START_POS else 1 << _fill_bit(*pos)
+    for pos, d in WHERE
+]
+MOVES = {
+    value: [
+        None if new[0] == START_POS else WHERE_INDEX.get(new)
+        for new in (_move(pos, d, value) for pos, d in WHERE)
+    ]
+    for value in ('card_foot', 'card_left', 'card_right')
+}
+
+FILL_MASK = (1 << 20) - 1
+WHERE_SHIFT = 20
+WHERE_MASK = 127
+TAKEN_SHIFT = 27
+TAKEN_BITS = 6
+TAKEN_MASK = (1 << TAKEN_BITS) - 1
+
+# Heap entries and the table of seen states are packed into ints as
+# well: no tuples per state, and one table to grow and free instead of
+# two.  Heap entries are (estimate, COST_MASK - cost, state); the table
+# has (cost, parent state, deck index) for each state.
+STATE_BITS = 64
+STATE_MASK = (1 << STATE_BITS) - 1
+COST_BITS = 9
+COST_MASK = (1 << COST_BITS) - 1
+DECK_BITS = 3
+DECK_MASK = (1 << DECK_BITS) - 1
+
+
+def symbol_fills(name):
+    """Fill masks of the shapes listed for the given symbol"""
+    return frozenset(symtable.load().fills(name))
+
+
+def plan(decks, targets, pos=START_POS, d=START_D, fill=0):
+    """Return the shortest list of deck indices to draw from, or None
+
+    `decks` are lists of card values, with the top card last.
+    The cards are drawn from the worm's current `pos`, `d` and `fill`
+    until `fill` is one of `targets`.  None means no sequence gets there.
+    """
+    search = search_plan(decks, targets, pos, d, fill)
+    while True:
+        try:
+            next(search)
+        except StopIteration as e:
+            return e.value
+
+
+class SearchTooLong(Exception):
+    """The search saw more than the allowed number of states"""
+
+
+def search_plan(decks, targets, pos=START_POS, d=START_D, fill=0,
+                max_states=None):
+    """Generator version of plan(), for spreading the search over frames
+
+    Yields (None) after each state it looks at; the plan is the
+    generator's return value.  Raises SearchTooLong after `max_states`
+    states, which keeps its tables (and the pauses to grow them) small.
+    """
+    targets = frozenset(targets)
+    estimate_cache = {}
+
+    def estimate(where_fill):
+        """Lower bound on the cards needed to reach a target, or None"""
+        try:
+            return estimate_cache[where_fill]
+        except KeyError:
+            pass
+        pos, d = WHERE[where_fill >> WHERE_SHIFT]
+        fill = where_fill & FILL_MASK
+        result = estimate_cache[where_fill] = min(
+            (
+                _lower_bound(pos, d, target & ~fill)
+                for target in targets
+                if fill & ~target == 0
+            ),
+            default=None,
+        )
+        return result
+
+    # States are packed into ints: the fill mask, then the index of
+    # (pos, d) in WHERE, then the number of cards taken from each deck
+    start = WHERE_INDEX[pos, d] << WHERE_SHIFT | fill
+    if estimate(start) is None:
+        return None
+    cards = [[MOVES[value] for value in reversed(deck)] for deck in decks]
+    seen = {start: 0}
+    heap = [(estimate(start) << COST_BITS | COST_MASK) << STATE_BITS | start]
+    while heap:
+        entry = heappop(heap)
+        state = entry & STATE_MASK
+        if state & FILL_MASK in targets:
+            return _backtrack(seen, start, state)
+        cost = COST_MASK - (entry >> STATE_BITS & COST_MASK)
+        if cost > seen[state] >> STATE_BITS + DECK_BITS:
+            continue
+        cost += 1
+        where = state >> WHERE_SHIFT & WHERE_MASK
+        for i, deck in enumerate(cards):
+            shift = TAKEN_SHIFT + i * TAKEN_BITS
+            num_taken = state >> shift & TAKEN_MASK
+            if num_taken >= len(deck):
+                continue
+            new_where = deck[num_taken][where]
+            if new_where is None:
+                # Crashing never helps: later cards do nothing
+                continue
+            where_fill = (
+                new_where << WHERE_SHIFT
+                | state & FILL_MASK
+                | WHERE_FILL[new_where]
+            )
+            remaining = estimate(where_fill)
+            yield
+            if remaining is None:
+                continue
+            new_state = (state >> TAKEN_SHIFT) + (1 << i * TAKEN_BITS)
+            new_state = new_state << TAKEN_SHIFT | where_fill
+            seen_cost = seen.get(new_state)
+            if seen_cost is not None and seen_cost >> STATE_BITS + DECK_BITS <= cost:
+                continue
+            if max_states is not None and len(seen) >= max_states:
+                raise SearchTooLong(max_states)
+            seen[new_state] = (cost << STATE_BITS | state) << DECK_BITS | i
+            heappush(
+                heap,
+                ((cost + remaining) << COST_BITS | COST_MASK - cost) << STATE_BITS
+                | new_state,
+            )
+    return None
+
+
+@lru_cache(maxsize=None)
+def _lower_bound(pos, d, missing_bits):
+    """Lower bound on the cards needed to fill the given tiles
+
+    Each missing tile needs a step into it.  Before the first one, the
+    worm walks at least to the nearest.  It goes in straight lines, so
+    tiles not ahead of it need a turn for each row/column covering them.
+    """
+    missing = [TILES[bit] for bit in BITS if missing_bits >> bit & 1]
+    if not missing:
+        return 0
+    x, y = pos
+    dx, dy = d
+    distance = min(abs(tx - x) + abs(ty - y) for tx, ty in missing)
+    not_ahead = [
+        (tx, ty) for tx, ty in missing
+        if not ((tx - x) * dy == (ty - y) * dx and (tx - x) * dx + (ty - y) * dy > 0)
+    ]
+    return len(missing) + distance - 1 + _num_lines(not_ahead)
+
+
+def _num_lines(tiles):
+    """Fewest rows & columns that cover all given tiles"""
+    best = len(tiles)
+    for columns in range(16):
+        rows = {y for x, y in tiles if not columns >> x & 1}
+        best = min(best, bin(columns).count('1') + len(rows))
+    return best
+
+
+def _backtrack(seen, start, state):
+    result = []
+    while state != start:
+        entry = seen[state]
+        result.append(entry & DECK_MASK)
+        state = entry >> DECK_BITS & STATE_MASK
+    result.reverse()
+    return result
+
+
+def main(argv):
+    from .burrow import deal_values, BurrowPath
+
+    num_deals = 100
+    seed = None
+    args = iter(argv)
+    for arg in args:
+        if arg == '--deals':
+            num_deals = int(next(args))
+        elif arg == '--seed':
+            seed = int(next(args))
+        else:
+            print(f'unknown argument: {arg}')
+            return 2
+    random.seed(seed)
+    letter_fills = {letter: symbol_fills(letter) for letter in 'HELP'}
+    failures = 0
+    for deal_number in range(num_deals):
+        decks = deal_values()
+        # The game starts by drawing from the first deck
+        path = BurrowPath()
+        path.push(decks[0].pop())
+        pos, d, crashed = path.end
+        for letter, fills in letter_fills.items():
+            result = plan(decks, fills, pos, d, path.fill())
+            if result is None:
+                failures += 1
+                print(f'deal {deal_number}: {letter} is unreachable')
+                print('   ', *(''.join(c[5] for c in deck) for deck in decks))
+    print(f'{num_deals} deals checked, {failures} unreachable letters')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,13 +1,12 @@
 import string
 from operator import itemgetter
-from itertools import chain
 
 from wasabi2d import Group, keys, clock
 
-from .thing import get_thing_sprite_info
 from .common import add_key_icon, add_space_instruction, THAT_BLUE
 from .fixes import animate
 from .music import play_sound
+from .thumbnails import TILE_SIZE
 
 KEY_VALUES = {getattr(keys, k): k for k in string.ascii_uppercase}
 for prefix in 'K_', 'KP_', 'F':
@@ -33,35 +32,31 @@ def make_palette(self):
     self.item_kbd_labels = {}
     self.item_shortcuts = {}
     self.assigned_shortcuts = {}
+    thumbnails = game.thumbnails
     for i, item in self.things.items():
-        item_sprites = self.item_sprites[i] = {}
-        menu_sprites = self.menu_sprites[i] = {}
-        for x, y, image, angle in get_thing_sprite_info(item):
-            s = self.menu_layer.add_sprite(image, pos=(x * 16, y * 16), angle=angle, scale=1/4+1/64, color=(.5, .5, .5, 1))
-            menu_sprites[x, y] = s
-            s = self.item_layer.add_sprite(image, pos=(x * 16, y * 16), angle=angle, scale=1/4+1/64, color=(0, 0, 0, 1))
-            item_sprites[x, y] = s
-        maxx = max(xy[0] for xy in item_sprites)
-        maxy = max(xy[1] for xy in item_sprites)
-        self.item_bottoms[i] = bot = 4 - maxy
-        self.item_rights[i] = 3 - maxx
-        for s in chain(item_sprites.values(), menu_sprites.values()):
-            s.x += (3-maxx)/2 * 16
-            s.y += bot/2 * 16
+        self.item_bottoms[i] = bot = 4 - item.max_y
+        self.item_rights[i] = right = 3 - item.max_x
+        pos = right/2 * 16, bot/2 * 16
+        menu_sprite = self.menu_sprites[i] = thumbnails.add_sprite(
+            self.menu_layer, item, 16, pos=pos, color=(.5, .5, .5, 1),
+        )
+        item_sprite = self.item_sprites[i] = thumbnails.add_sprite(
+            self.item_layer, item, 16, pos=pos, color=(0, 0, 0, 1),
+        )
         thing_bg = self.ui_layer.add_sprite('thing_bg', color=(1, 1, 1, 0.5), pos=(0.5*16, 2*16))
-        menu_group = self.menu_groups[i] = Group((*menu_sprites.values(), thing_bg))
-        item_group = self.item_groups[i] = Group((*item_sprites.values(), ))
+        menu_group = self.menu_groups[i] = Group((menu_sprite, thing_bg))
+        item_group = self.item_groups[i] = Group((item_sprite, ))
         item_group.pos = menu_group.pos = self.menu_pos(i)
         self.item_shortcuts[i] = []
-        self.item_kbd_labels[x, y] = []
+        self.item_kbd_labels[i] = []
         self.assign_key(i, str((i + 1) % 10))
 
     for i, item in self.things.items():
-        code, tileinfo, label = item.split('-')
+        label = item.label
         if len(label) == 1 and label in string.ascii_uppercase:
             self.assign_key(i, label)
     for i, item in self.things.items():
-        code, tileinfo, label = item.split('-')
+        label = item.label
         if len(label) == 1 and label in string.ascii_lowercase:
             self.assign_key(i, label.upper())
 
@@ -143,14 +138,14 @@ class Shadowing(_Common):
         if place is None:
             place = self.selected_pos
         if (prev := self.game.info.display[place]) != None:
-            self.game.info.display[place] = None
+            self.game.info.set_display(place, None)
             self.anim_to_menu(prev)
         if (thing := self.things.get(i)):
             for j, prev in enumerate(self.game.info.display):
                 if prev == i:
                     if j != place:
                         self.select(None, j)
-            self.game.info.display[place] = i
+            self.game.info.set_display(place, i)
             self.anim_to_place(i, place)
             self.adjust_selection(1)
         print('That spells: ', self.game.info.message)
@@ -159,16 +154,16 @@ class Shadowing(_Common):
         group = self.item_groups[i]
         right = self.item_rights[i]
         bottom = self.item_bottoms[i]
-        for (x, y), sprite in self.item_sprites[i].items():
-            animate(sprite, pos=((x+right/2)*32, (y+bottom)*32), scale=1/2+1/64, duration=d, tween='decelerate')
+        sprite = self.item_sprites[i]
+        animate(sprite, pos=(right/2*32, bottom*32), scale=32/TILE_SIZE, duration=d, tween='decelerate')
         animate(group, pos=self.display_pos(place), duration=d)
 
     def anim_to_menu(self, i, d=1/4):
         group = self.item_groups[i]
         right = self.item_rights[i]
         bottom = self.item_bottoms[i]
-        for (x, y), sprite in self.item_sprites[i].items():
-            animate(sprite, pos=((x+right/2)*16, (y+bottom/2)*16), scale=1/4+1/64, duration=d, tween='accelerate')
+        sprite = self.item_sprites[i]
+        animate(sprite, pos=(right/2*16, bottom/2*16), scale=16/TILE_SIZE, duration=d, tween='accelerate')
         animate(group, pos=self.menu_pos(i), duration=d)
 
     def adjust_selection(self, adjustment):
@@ -214,14 +209,12 @@ class CastAway(_Common):
 
     def select(self, i, place=None):
         play_sound('menu-move')
-        for ss in self.item_sprites.values():
-            for s in ss.values():
-                s.color = 0, 0, 0, 1
+        for s in self.item_sprites.values():
+            s.color = 0, 0, 0, 1
         if self.things[i]:
             self.selection = i
         if self.selection is not None:
-            for s in self.item_sprites[self.selection].values():
-                s.color = 1, .2, 0, 1
+            self.item_sprites[self.selection].color = 1, .2, 0, 1
             spc_alpha = 1
         else:
             spc_alpha = 0
@@ -0,0 +1,192 @@
+"""Symbol lookup table covering every possible Thing shape
+
+A Thing's shape is its 20-bit fill mask (see thing.ThingGrid), so all
+shapes fit in a 1 MiB table with one byte per shape.  The low 7 bits of
+each entry give the index of the symbol nearest to the shape (by Hamming
+distance, ties going to the symbol listed first), and the EXACT bit is
+set if the shape is listed in symbols.txt under that symbol.
+
+The table is built from text/symbols.txt by `python -m mufl.textc`,
+and memory-mapped at runtime.  It records a digest of the symbols.txt it
+was built from; if that no longer matches, the table is rebuilt in memory.
+"""
+
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import mmap
+import pkgutil
+import struct
+
+import numpy
+
+NUM_BITS = 20
+TABLE_SIZE = 1 << NUM_BITS
+EXACT = 0x80
+MAX_SYMBOLS = EXACT
+
+MAGIC = b'MUFLSYM2'
+HEADER = struct.Struct('<8s32sI')
+TABLE_PATH = Path(__file__).parent / 'text' / 'symbols.tbl'
+
+
+def source_digest(data):
+    return hashlib.sha256(data).digest()
+
+
+def encode_fill(fill):
+    return ''.join(chr(48 + (fill >> x * 5 & 31)) for x in range(4))
+
+
+def decode_fill(letter):
+    if len(letter) != 4:
+        raise ValueError(f'bad letter code: {letter!r}')
+    fill = 0
+    for x, c in enumerate(letter):
+        num = ord(c) - 48
+        if not 0 <= num < 32:
+            raise ValueError(f'bad letter code: {letter!r}')
+        fill |= num << x * 5
+    return fill
+
+
+def parse_symbols(text):
+    """Parse symbols.txt into a list of names and a {code: name} dict"""
+    names = []
+    codes = {}
+    for line in text.splitlines():
+        sym, line_codes = line.rsplit(maxsplit=1)
+        names.append(sym)
+        for i in range(0, len(line_codes), 4):
+            codes[line_codes[i:i+4]] = sym
+    return names, codes
+
+
+def build_table(names, codes):
+    """Compute the table for the given symbols; return it as a numpy array"""
+    if len(names) > MAX_SYMBOLS:
+        raise ValueError(f'too many symbols: {len(names)}')
+    sym_ids = {name: i for i, name in enumerate(names)}
+    unset = numpy.uint8(0xff)
+    nearest = numpy.full(TABLE_SIZE, unset, dtype=numpy.uint8)
+    dist = numpy.full(TABLE_SIZE, unset, dtype=numpy.uint8)
+    for code, sym in codes.items():
+        fill = decode_fill(code)
+        nearest[fill] = sym_ids[sym]
+        dist[fill] = 0
+
+    # Breadth-first search outwards from the listed shapes, one bit flip
+    # at a time
+    fills = numpy.arange(TABLE_SIZE)
+    best = numpy.empty_like(nearest)
+    level = 0
+    while (dist == unset).any():
+        level += 1
+        best[:] = unset
+        for bit in range(NUM_BITS):
+            neighbors = fills ^ (1 << bit)
+            found = dist[neighbors] == level - 1
+            numpy.minimum(
+                best,
+                numpy.where(found, nearest[neighbors], unset),
+                out=best,
+            )
+        new = (dist == unset) & (best != unset)
+        nearest[new] = best[new]
+        dist[new] = level
+    return nearest | numpy.where(dist == 0, EXACT, 0).astype(numpy.uint8)
+
+
+def write_table(path, names, table, digest):
+    header = '\n'.join(names).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, digest, len(header)))
+        f.write(header)
+        f.write(table.tobytes())
+
+
+class SymbolTable(Mapping):
+    """Read-only {letter code: symbol name} mapping backed by the table
+
+    Besides the Mapping interface, shapes can be looked up directly
+    by fill mask with `lookup` and `nearest`, or in bulk with `entries`;
+    `fills` lists the shapes of a symbol.
+    """
+    def __init__(self, names, table):
+        self.names = names
+        self.table = table
+
+    @classmethod
+    def from_file(cls, path=TABLE_PATH, digest=None):
+        """Map a table file; raise ValueError if it doesn't match `digest`"""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_digest, header_len = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a symbol table')
+        if digest is not None and digest != file_digest:
+            raise ValueError(f'{path} is stale')
+        start = HEADER.size + header_len
+        names = mm[HEADER.size:start].decode('utf-8').split('\n')
+        table = memoryview(mm)[start:start+TABLE_SIZE]
+        if len(table) != TABLE_SIZE:
+            raise ValueError(f'{path} is truncated')
+        return cls(names, table)
+
+    @classmethod
+    def from_text(cls, text):
+        names, codes = parse_symbols(text)
+        return cls(names, build_table(names, codes).tobytes())
+
+    def lookup(self, fill):
+        """Symbol listed for the given fill mask, or None"""
+        entry = self.table[fill]
+        if entry & EXACT:
+            return self.names[entry & ~EXACT]
+        return None
+
+    def nearest(self, fill):
+        """Symbol nearest to the given fill mask"""
+        return self.names[self.table[fill] & ~EXACT]
+
+    def fills(self, name):
+        """Fill masks listed for the given symbol, as a list"""
+        entries = numpy.frombuffer(self.table, dtype=numpy.uint8)
+        ids = [EXACT | i for i, n in enumerate(self.names) if n == name]
+        return numpy.flatnonzero(numpy.isin(entries, ids)).tolist()
+
+    def entries(self, fills):
+        """Raw table entries for an array of fill masks"""
+        return numpy.frombuffer(self.table, dtype=numpy.uint8)[fills]
+
+    def __getitem__(self, code):
+        try:
+            fill = decode_fill(code)
+        except (TypeError, ValueError):
+            raise KeyError(code)
+        result = self.lookup(fill)
+        if result is None:
+            raise KeyError(code)
+        return result
+
+    def _exact_fills(self):
+        entries = numpy.frombuffer(self.table, dtype=numpy.uint8)
+        return numpy.flatnonzero(entries & EXACT)
+
+    def __iter__(self):
+        for fill in self._exact_fills():
+            yield encode_fill(int(fill))
+
+    def __len__(self):
+        return len(self._exact_fills())
+
+
+@lru_cache(maxsize=None)
+def load():
+    data = pkgutil.get_data('mufl', 'text/symbols.txt')
+    try:
+        return SymbolTable.from_file(digest=source_digest(data))
+    except (OSError, ValueError) as e:
+        print(f'Not using compiled symbols ({e}); run: python -m mufl.textc')
+        return SymbolTable.from_text(data.decode('utf-8'))
@@ -0,0 +1,159 @@
+"""Check and compile the game's text resources
+
+    python -m mufl.textc [--strict]
+
+validates text/symbols.txt and text/actions.txt, then writes
+text/symbols.tbl (see symtable.py) and text/actions.bin, so the game
+doesn't parse text at startup.  Problems are reported; errors stop the
+build, and with --strict so do warnings.
+
+Each compiled file records a digest of its source.  If the source has
+changed since, the game falls back to parsing the text.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+import marshal
+import pkgutil
+import re
+import sys
+
+from . import symtable
+from .symtable import source_digest
+
+TEXT_DIR = Path(__file__).parent / 'text'
+ACTIONS_PATH = TEXT_DIR / 'actions.bin'
+PERFORATION = ' 8< '.center(42, '-')
+
+# Costs shown as icons on the island (see info.COLORS), or e.g. '×30'
+COST_ITEMS = {'food', 'magic', 'cube', 'thing'}
+COST_MULTIPLIER_RE = re.compile(r'×\d+')
+
+
+def check_symbols(text):
+    """Return (errors, warnings) found in symbols.txt"""
+    errors = []
+    warnings = []
+    name_lines = {}
+    code_lines = {}
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        try:
+            sym, codes = line.rsplit(maxsplit=1)
+        except ValueError:
+            errors.append(f'symbols.txt:{lineno}: expected a name and codes')
+            continue
+        if sym in name_lines:
+            warnings.append(
+                f'symbols.txt:{lineno}: {sym!r} already listed '
+                + f'on line {name_lines[sym]}'
+            )
+        name_lines[sym] = lineno
+        if len(codes) % 4:
+            errors.append(f'symbols.txt:{lineno}: codes must have 4 characters')
+        for i in range(0, len(codes), 4):
+            code = codes[i:i+4]
+            try:
+                symtable.decode_fill(code)
+            except ValueError:
+                errors.append(f'symbols.txt:{lineno}: bad code {code!r}')
+                continue
+            if code in code_lines:
+                prev_sym, prev_lineno = code_lines[code]
+                if prev_sym == sym:
+                    warnings.append(
+                        f'symbols.txt:{lineno}: duplicate code {code!r} '
+                        + f'for {sym!r}'
+                    )
+                else:
+                    warnings.append(
+                        f'symbols.txt:{lineno}: code {code!r} is {sym!r} '
+                        + f'but also {prev_sym!r} on line {prev_lineno}; '
+                        + f'{sym!r} wins'
+                    )
+            code_lines[code] = sym, lineno
+    return errors, warnings
+
+
+def parse_actions(text):
+    """Parse actions.txt into (caption, cost, description) tuples"""
+    actions = []
+    for txt in text.split(PERFORATION):
+        txt = txt.strip()
+        lines = txt.splitlines()
+        cost = lines[1].split()
+        assert not lines[2], lines[2]
+        actions.append((lines[0], tuple(cost), tuple(lines[3:])))
+    return tuple(actions)
+
+
+def check_actions(text):
+    """Return (errors, warnings) found in actions.txt"""
+    errors = []
+    for i, txt in enumerate(text.split(PERFORATION), start=1):
+        lines = txt.strip().splitlines()
+        where = f'actions.txt: action {i}'
+        if len(lines) < 3:
+            errors.append(f'{where}: expected caption, cost and blank line')
+            continue
+        if not lines[0].strip():
+            errors.append(f'{where}: missing caption')
+        for item in lines[1].split():
+            if item not in COST_ITEMS and not COST_MULTIPLIER_RE.fullmatch(item):
+                errors.append(f'{where}: bad cost item {item!r}')
+        if lines[2].strip():
+            errors.append(f'{where}: cost must be followed by a blank line')
+    return errors, []
+
+
+@lru_cache(maxsize=None)
+def load_actions():
+    """Get the parsed actions, from actions.bin unless it's stale"""
+    data = pkgutil.get_data('mufl', 'text/actions.txt')
+    try:
+        with open(ACTIONS_PATH, 'rb') as f:
+            digest, actions = marshal.load(f)
+        if digest != source_digest(data):
+            raise ValueError(f'{ACTIONS_PATH} is stale')
+        return actions
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        print(f'Not using compiled actions ({e}); run: python -m mufl.textc')
+        return parse_actions(data.decode('utf-8'))
+
+
+def main(argv):
+    strict = '--strict' in argv
+    symbols_data = pkgutil.get_data('mufl', 'text/symbols.txt')
+    actions_data = pkgutil.get_data('mufl', 'text/actions.txt')
+    errors = []
+    warnings = []
+    for check, data in (
+        (check_symbols, symbols_data),
+        (check_actions, actions_data),
+    ):
+        new_errors, new_warnings = check(data.decode('utf-8'))
+        errors.extend(new_errors)
+        warnings.extend(new_warnings)
+    for message in errors:
+        print('error:', message)
+    for message in warnings:
+        print('warning:', message)
+    if errors or (strict and warnings):
+        print('Not compiling.')
+        return 1
+
+    names, codes = symtable.parse_symbols(symbols_data.decode('utf-8'))
+    table = symtable.build_table(names, codes)
+    symtable.write_table(
+        symtable.TABLE_PATH, names, table, source_digest(symbols_data),
+    )
+    print(f'Wrote {symtable.TABLE_PATH}: {len(names)} symbols, {len(codes)} shapes')
+
+    actions = parse_actions(actions_data.decode('utf-8'))
+    with open(ACTIONS_PATH, 'wb') as f:
+        marshal.dump((source_digest(actions_data), actions), f)
+    print(f'Wrote {ACTIONS_PATH}: {len(actions)} actions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
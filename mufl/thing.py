@@ -1,9 +1,11 @@
+from dataclasses import dataclass, field
 from math import tau
 from random import choice
-import pkgutil
 import string
 
 from .common import change_sprite_image
+from .symtable import encode_fill, decode_fill
+from . import symtable
 
 ROTS = {
     (1, 0): 0,
@@ -12,103 +14,186 @@ ROTS = {
     (0, -1): 3,
 }
 
-SYMBOLS = {}
-text = pkgutil.get_data('mufl', 'text/symbols.txt').decode('utf-8')
-for line in text.splitlines():
-    sym, codes = line.rsplit(maxsplit=1)
-    for i in range(0, len(codes), 4):
-        key = codes[i:i+4]
-        SYMBOLS[key] = sym
+def __getattr__(name):
+    # SYMBOLS is only loaded when first needed
+    if name == 'SYMBOLS':
+        return symtable.load()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def _fill_bit(x, y):
+    """Bit index of tile (x, y) in a ThingGrid fill mask
+
+    Columns take 5 bits each, with the top tile in the highest bit,
+    so a column's bits are exactly one character of the letter code.
+    """
+    return x * 5 + 4 - y
+
 
 def encode_letter(letter):
-    enc = []
-    for x in range(4):
-        num = 0
-        for y in range(5):
-            num <<= 1
-            if (x, y) in letter:
-                num += 1
-        enc.append(chr(48+num))
-    return ''.join(enc)
-
-class ThingTile:
-    def __init__(self):
-        self.filled = False
-        self.corners = [False] * 4
-
-    def get_sprite_info(self):
-        fc = '01'[self.filled]
-        num_corners = sum(self.corners)
-        if num_corners == 0:
-            return f'block_{fc}0000', 0
-        elif num_corners == 1:
-            return f'block_{fc}1000', tau/4 * self.corners.index(True)
-        elif num_corners == 2:
-            if self.corners == [True, False, True, False]:
-                return f'block_{fc}1010', 0
-            elif self.corners == [False, True, False, True]:
-                return f'block_{fc}1010', tau/4
-            elif self.corners == [True, False, False, True]:
-                return f'block_{fc}1100', tau*3/4
-            else:
-                return f'block_{fc}1100', tau/4 * self.corners.index(True)
-        elif num_corners == 3:
-            return f'block_{fc}1110', tau/4 * (self.corners.index(False) + 2)
+    fill = 0
+    for x, y in letter:
+        fill |= 1 << _fill_bit(x, y)
+    return encode_fill(fill)
+
+
+def _tile_sprite_info(num):
+    fc = '01'[num >> 4]
+    corners = [bool(num & (8 >> c)) for c in range(4)]
+    num_corners = sum(corners)
+    if num_corners == 0:
+        return f'block_{fc}0000', 0
+    elif num_corners == 1:
+        return f'block_{fc}1000', tau/4 * corners.index(True)
+    elif num_corners == 2:
+        if corners == [True, False, True, False]:
+            return f'block_{fc}1010', 0
+        elif corners == [False, True, False, True]:
+            return f'block_{fc}1010', tau/4
+        elif corners == [True, False, False, True]:
+            return f'block_{fc}1100', tau*3/4
+        else:
+            return f'block_{fc}1100', tau/4 * corners.index(True)
+    elif num_corners == 3:
+        return f'block_{fc}1110', tau/4 * (corners.index(False) + 2)
+    else:
+        return f'block_{fc}1111', 0
+
+# Sprite (image, angle) for each tile number: fill bit, then corners 0-3
+TILE_SPRITES = tuple(_tile_sprite_info(num) for num in range(32))
+
+_TILE_CHARS = tuple(chr(48 + num) for num in range(32))
+_TILE_BITS = tuple(_fill_bit(i // 5, i % 5) for i in range(20))
+
+
+class ThingGrid:
+    """The 4x5 board a Thing is burrowed in, packed into two ints
+
+    `fill` has bit `_fill_bit(x, y)` set for each filled tile.
+    `corners` has a nibble for each tile at 4 * `_fill_bit(x, y)`, with
+    corner 0 in the nibble's highest bit; a tile's number (as used in the
+    tile code) is then just its fill bit followed by its nibble.
+    """
+    __slots__ = ('fill', 'corners')
+
+    def __init__(self, fill=0, corners=0):
+        self.fill = fill
+        self.corners = corners
+
+    def __contains__(self, pos):
+        x, y = pos
+        return 0 <= x < 4 and 0 <= y < 5
+
+    def copy(self):
+        return ThingGrid(self.fill, self.corners)
+
+    def is_filled(self, pos):
+        return bool(self.fill >> _fill_bit(*pos) & 1)
+
+    def set_filled(self, pos, filled=True):
+        bit = 1 << _fill_bit(*pos)
+        if filled:
+            self.fill |= bit
         else:
-            return f'block_{fc}1111', 0
+            self.fill &= ~bit
 
-    def update_sprite(self, sprite):
-        image, rotation = self.get_sprite_info()
+    def set_corner(self, pos, c):
+        self.corners |= (8 >> c % 4) << 4 * _fill_bit(*pos)
+
+    def set_wormy_corners(self, pos, d, plus=0):
+        rot = ROTS[d] + plus
+        nibble = (8 >> rot % 4) | (8 >> (rot - 1) % 4)
+        self.corners |= nibble << 4 * _fill_bit(*pos)
+
+    def tile_num(self, pos):
+        bit = _fill_bit(*pos)
+        return (self.fill >> bit & 1) << 4 | self.corners >> 4 * bit & 15
+
+    def get_sprite_info(self, pos):
+        return TILE_SPRITES[self.tile_num(pos)]
+
+    def update_sprite(self, pos, sprite):
+        image, rotation = TILE_SPRITES[self.tile_num(pos)]
         change_sprite_image(sprite, image)
         sprite.angle = rotation
 
-    def set_wormy_corners(self, d, plus=0):
-        rot = ROTS[d] + plus
-        self.set_corner(rot)
-        self.set_corner(rot-1)
+    def classify(self):
+        return encode_fill(self.fill)
 
-    def set_corner(self, c):
-        self.corners[c%4] = True
+    def encode_tiles(self):
+        fill = self.fill
+        corners = self.corners
+        return ''.join([
+            _TILE_CHARS[(fill >> bit & 1) << 4 | corners >> 4 * bit & 15]
+            for bit in _TILE_BITS
+        ])
 
     def encode(self):
-        num = int(self.filled)
-        for corner in self.corners:
-            num <<= 1
-            num |= corner
-        return chr(ord('0') + num)
+        letter = encode_fill(self.fill)
+        sym = symtable.load().lookup(self.fill) or ''
+        return f'{letter}-{self.encode_tiles()}-{sym}'
 
     @classmethod
-    def from_code(cls, code):
+    def from_tiles(cls, tileinfo):
         self = cls()
-        num = ord(code) - ord('0')
-        for i, corner in reversed(list(enumerate(self.corners))):
-            self.corners[i] = bool(num & 1)
-            num >>= 1
-        self.filled = bool(num & 1)
+        for i, c in enumerate(tileinfo):
+            num = ord(c) - 48
+            bit = _fill_bit(i // 5, i % 5)
+            self.fill |= (num >> 4) << bit
+            self.corners |= (num & 15) << 4 * bit
         return self
 
-def encode_thing(thing):
-    thingset = {pos for pos, tile in thing.items() if tile.filled}
-    letter = encode_letter(thingset)
-    tileset = ''.join(thing[x, y].encode() for x in range(4) for y in range(5))
-    return f'{letter}-{tileset}-{SYMBOLS.get(letter, "")}'
 
+_interned_things = {}
 
-def classify_thing(thing):
-    shape = frozenset(pos for (pos, tile) in thing.items() if tile.filled)
-    return encode_letter(shape)
+@dataclass(frozen=True)
+class Thing:
+    """A finished Thing, as kept in the inventory
+
+    Things are saved as 'code-tiles-label' strings; use Thing.parse to
+    get the (interned) Thing for such a string, and str() to get it back.
+    """
+    code: str
+    tiles: str
+    label: str
+    sprite_info: tuple = field(init=False, repr=False, compare=False)
+    max_x: int = field(init=False, repr=False, compare=False)
+    max_y: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.code) != 4 or len(self.tiles) != 20:
+            raise ValueError(f'bad Thing: {self}')
+        sprite_info = tuple(
+            (i // 5, i % 5, *TILE_SPRITES[ord(c) - 48])
+            for i, c in enumerate(self.tiles)
+            if c != '0'
+        )
+        object.__setattr__(self, 'sprite_info', sprite_info)
+        object.__setattr__(self, 'max_x', max((x for x, *_ in sprite_info), default=0))
+        object.__setattr__(self, 'max_y', max((y for x, y, *_ in sprite_info), default=0))
+
+    @classmethod
+    def parse(cls, string):
+        try:
+            return _interned_things[string]
+        except KeyError:
+            pass
+        code, tiles, label = string.split('-', 2)
+        thing = _interned_things[string] = cls(code, tiles, label)
+        return thing
+
+    def __str__(self):
+        return f'{self.code}-{self.tiles}-{self.label}'
 
 
-def get_thing_sprite_info(thing_string):
-    code, tileinfo, comment = thing_string.split('-')
-    for i, c in enumerate(tileinfo):
-        if c != '0':
-            x = i // 5
-            y = i % 5
-            yield (x, y, *ThingTile.from_code(c).get_sprite_info())
+def encode_thing(thing):
+    return Thing.parse(thing.encode())
+
+
+def classify_thing(thing):
+    return thing.classify()
 
 def get_thing_mesage(encoded):
-    sym = SYMBOLS.get(encoded)
+    sym = symtable.load().get(encoded)
     def cls(*choices):
         return choice(list(set((choices))))
     usefuls = (
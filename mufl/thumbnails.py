@@ -0,0 +1,107 @@
+"""Pre-rendered images of Things
+
+Each distinct Thing is drawn once, into a region of the sprite atlas,
+so it can be shown as a single sprite at any scale.
+
+Parts pilfered from wasabi2d/atlas.py
+"""
+
+from math import degrees
+
+import pygame
+from pygame import Rect
+from wasabi2d.atlas import TextureRegion
+from wasabi2d.loaders import images
+
+TILE_SIZE = 32
+
+
+def render_thing(thing):
+    """Draw the given Thing's tiles onto a new pygame Surface"""
+    surface = pygame.Surface((4 * TILE_SIZE, 5 * TILE_SIZE), pygame.SRCALPHA)
+    for x, y, image, angle in thing.sprite_info:
+        tile = pygame.transform.smoothscale(images.load(image), (TILE_SIZE, TILE_SIZE))
+        # Sprites rotate clockwise (y points down); pygame counter-clockwise
+        tile = pygame.transform.rotate(tile, -degrees(angle))
+        # Tiles don't overlap: copy pixels as they are, without blending
+        surface.blit(
+            tile, (x * TILE_SIZE, y * TILE_SIZE),
+            special_flags=pygame.BLEND_RGBA_MAX,
+        )
+    return surface
+
+
+class ThumbnailCache:
+    """Atlas images of Things, keyed by their tile codes
+
+    Regions of evicted images are reused for new ones (all have the same
+    size), since the atlas itself can't free space.
+    """
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.names = {}
+        self.free_regions = []
+
+    def get(self, thing):
+        """Get the name of the sprite image for the given Thing"""
+        try:
+            return self.names[thing.tiles]
+        except KeyError:
+            pass
+        img = render_thing(thing)
+        if self.free_regions:
+            region = self.free_regions.pop()
+        else:
+            region = self._alloc(img.get_rect())
+        region.write(img)
+        name = self.names[thing.tiles] = f'thing_{thing.tiles}'
+        self.atlas.tex_for_name[name] = region
+        return name
+
+    def add_sprite(self, layer, thing, spacing, **kwargs):
+        """Add a sprite of a Thing, with tiles `spacing` pixels apart
+
+        The sprite is anchored at the center of the Thing's top left tile.
+        """
+        return layer.add_sprite(
+            self.get(thing),
+            anchor_x=TILE_SIZE / 2,
+            anchor_y=TILE_SIZE / 2,
+            scale=spacing / TILE_SIZE,
+            **kwargs,
+        )
+
+    def evict(self, thing):
+        """Forget the image of the given Thing
+
+        Sprites still showing it should be gone before the next `get`,
+        which may reuse its region.
+        """
+        name = self.names.pop(thing.tiles, None)
+        if name:
+            self.free_regions.append(self.atlas.tex_for_name.pop(name))
+
+    def _alloc(self, rect):
+        atlas = self.atlas
+        pad = atlas.padding * 2
+
+        r = Rect(rect)
+        r.w += pad
+        r.h += pad
+        bin, packed = atlas.packer.add(r)
+
+        p = Rect(packed)
+        p.left += atlas.padding
+        p.top += atlas.padding
+        p.w -= pad
+        p.h -= pad
+
+        try:
+            reg = atlas.surfs_texs[bin]
+        except IndexError:
+            reg = atlas.mksurftex()
+
+        region = TextureRegion.for_rect(reg, p)
+        if rect.w != p.w:
+            region = region.rotated()
+        return region